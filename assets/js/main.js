@@ -92,3 +92,10 @@
         }, 200); // 200ms debounce
     });
 })();
+
+// Service worker for the fingerprinted assets (generated by tools/static_assets.py)
+if ('serviceWorker' in navigator && location.protocol === 'https:') {
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register('/sw.js').catch(err => console.warn('Service worker registration failed:', err));
+    });
+}
@@ -0,0 +1,67 @@
+(function () {
+const canvas = document.getElementById('matrix-bg');
+const ctx = canvas.getContext('2d');
+const scaleFactor = 2;
+function resizeCanvas() {
+canvas.width = window.innerWidth / scaleFactor;
+canvas.height = window.innerHeight / scaleFactor;
+}
+resizeCanvas();
+const katakana = 'アァカサタナハマヤャラワガザダバパイィキシチニヒミリヰギジヂビピウゥクスツヌフムユュルグズブヅプエェケセテネヘメレヱゲゼデベペオォコソトノホモヨョロヲゴゾドボポヴッン';
+const latin = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ';
+const nums = '0123456789';
+const alphabet = katakana + latin + nums;
+const fontSize = 16;
+let columns = canvas.width / fontSize;
+const rainDrops = [];
+for (let x = 0; x < columns; x++) {
+rainDrops[x] = 1;
+}
+let lastTime = 0;
+const fps = 20;
+const interval = 1000 / fps;
+const draw = (currentTime) => {
+requestAnimationFrame(draw);
+const deltaTime = currentTime - lastTime;
+if (deltaTime > interval) {
+lastTime = currentTime - (deltaTime % interval);
+ctx.fillStyle = 'rgba(0, 0, 0, 0.05)';
+ctx.fillRect(0, 0, canvas.width, canvas.height);
+ctx.fillStyle = '#0F0';
+ctx.font = fontSize + 'px monospace';
+for (let i = 0; i < rainDrops.length; i++) {
+const text = alphabet.charAt(Math.floor(Math.random() * alphabet.length));
+ctx.fillText(text, i * fontSize, rainDrops[i] * fontSize);
+if (rainDrops[i] * fontSize > canvas.height && Math.random() > 0.975) {
+rainDrops[i] = 0;
+}
+rainDrops[i]++;
+}
+}
+};
+requestAnimationFrame(draw);
+let resizeTimeout;
+window.addEventListener('resize', () => {
+clearTimeout(resizeTimeout);
+resizeTimeout = setTimeout(() => {
+const oldColumns = Math.floor(canvas.width / fontSize);
+const oldRainDrops = [...rainDrops];
+resizeCanvas();
+const newColumns = Math.floor(canvas.width / fontSize);
+columns = newColumns;
+rainDrops.length = newColumns;
+for (let x = 0; x < newColumns; x++) {
+if (x < oldColumns && x < oldRainDrops.length) {
+rainDrops[x] = oldRainDrops[x];
+} else {
+rainDrops[x] = Math.floor(Math.random() * -100);
+}
+}
+}, 200);
+});
+})();
+if ('serviceWorker' in navigator && location.protocol === 'https:') {
+window.addEventListener('load', () => {
+navigator.serviceWorker.register('/sw.js').catch(err => console.warn('Service worker registration failed:', err));
+});
+}
\ No newline at end of file
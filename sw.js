@@ -0,0 +1,224 @@
+// Generated by tools/static_assets.py, do not edit.
+const CACHE_NAME = 'alterpix-assets';
+const ASSETS = {
+  "assets/css/style.css": "d5cb109849",
+  "assets/css/style.min.css": "193e0280ec",
+  "assets/img/Help.cur": "d489936ad8",
+  "assets/img/Link.cur": "5f379257b8",
+  "assets/img/Move.cur": "30ebaf5647",
+  "assets/img/Normal.cur": "a2e901badc",
+  "assets/img/Text.cur": "a066d61807",
+  "assets/js/L2Dwidget.0.min.js": "0201a0d80d",
+  "assets/js/L2Dwidget.min.js": "a8838e32c6",
+  "assets/js/main.js": "09b4773df9",
+  "assets/js/main.min.js": "26d716e995",
+  "assets/live2d/pio/model.json": "41d3efe844",
+  "assets/live2d/pio/model.moc": "1545fdb296",
+  "assets/live2d/pio/motions/Breath1.mtn": "88a3aa1c03",
+  "assets/live2d/pio/motions/Breath2.mtn": "e85c1aa174",
+  "assets/live2d/pio/motions/Breath3.mtn": "1eb42542e7",
+  "assets/live2d/pio/motions/Breath4.mtn": "0ec09676f6",
+  "assets/live2d/pio/motions/Breath5.mtn": "c5f8f19c7c",
+  "assets/live2d/pio/motions/Breath6.mtn": "2fd76615ca",
+  "assets/live2d/pio/motions/Breath7.mtn": "d1e0852516",
+  "assets/live2d/pio/motions/Breath8.mtn": "926d5bec75",
+  "assets/live2d/pio/motions/Fail.mtn": "6077fa45a8",
+  "assets/live2d/pio/motions/Sleeping.mtn": "580e727c6a",
+  "assets/live2d/pio/motions/Success.mtn": "c4d0e5bbb6",
+  "assets/live2d/pio/motions/Sukebei1.mtn": "6be04895ab",
+  "assets/live2d/pio/motions/Sukebei2.mtn": "8d5384c849",
+  "assets/live2d/pio/motions/Sukebei3.mtn": "839689dd3e",
+  "assets/live2d/pio/motions/Touch Dere1.mtn": "a6bb2c878c",
+  "assets/live2d/pio/motions/Touch Dere2.mtn": "63f306f669",
+  "assets/live2d/pio/motions/Touch Dere3.mtn": "34306d2836",
+  "assets/live2d/pio/motions/Touch Dere4.mtn": "edec7f95c4",
+  "assets/live2d/pio/motions/Touch Dere5.mtn": "a019f4582e",
+  "assets/live2d/pio/motions/Touch Dere6.mtn": "3c76f49e40",
+  "assets/live2d/pio/motions/Touch1.mtn": "5e469705ba",
+  "assets/live2d/pio/motions/Touch2.mtn": "01f788de2c",
+  "assets/live2d/pio/motions/Touch3.mtn": "4b372eef10",
+  "assets/live2d/pio/motions/Touch4.mtn": "92cb4b3585",
+  "assets/live2d/pio/motions/Touch5.mtn": "da2fc3b647",
+  "assets/live2d/pio/motions/Touch6.mtn": "16235b16d0",
+  "assets/live2d/pio/motions/WakeUp.mtn": "022bfa8e9d",
+  "assets/live2d/pio/pio.moc": "e3b0c44298",
+  "assets/live2d/pio/textures.json": "432bdec99e",
+  "assets/live2d/pio/textures/Akiba Idol Costume.png": "f350939c19",
+  "assets/live2d/pio/textures/Animal Costume Racoon.png": "7e52a2d228",
+  "assets/live2d/pio/textures/Animal Costume.png": "431a9337a0",
+  "assets/live2d/pio/textures/Bunny Girl Costume Red.png": "04f0bbed57",
+  "assets/live2d/pio/textures/Bunny Girl Costume.png": "8e62d5e850",
+  "assets/live2d/pio/textures/Cake Costume Choco.png": "9126cc3db5",
+  "assets/live2d/pio/textures/Cake Costume Cream.png": "27c1f62283",
+  "assets/live2d/pio/textures/Dress Costume Brown.png": "a1c351737b",
+  "assets/live2d/pio/textures/Dress Costume.png": "f5c19f8d61",
+  "assets/live2d/pio/textures/Elementary School Costume Navy.png": "c855cef682",
+  "assets/live2d/pio/textures/Elementary School Costume.png": "c6bb61e052",
+  "assets/live2d/pio/textures/Fall Dress Costume Beige.png": "ecaccbb44f",
+  "assets/live2d/pio/textures/Fall Dress Costume Brown.png": "c8e0172c59",
+  "assets/live2d/pio/textures/Forest Witch Costume Brown.png": "47b1d1fc76",
+  "assets/live2d/pio/textures/Forest Witch Costume Green.png": "662ceff47d",
+  "assets/live2d/pio/textures/Frill Bikini Costume Green.png": "784eb880d4",
+  "assets/live2d/pio/textures/Frill Bikini Costume Purple.png": "2f6d0b7ea9",
+  "assets/live2d/pio/textures/Frill Blouse Costume Green.png": "48dd68e2e2",
+  "assets/live2d/pio/textures/Frill Blouse Costume Red.png": "779d25c3e8",
+  "assets/live2d/pio/textures/Furisode Costume.png": "be2ed3885b",
+  "assets/live2d/pio/textures/Goddess Costume Pink.png": "b9c1cbe392",
+  "assets/live2d/pio/textures/Goddess Costume White.png": "6f07f6bc98",
+  "assets/live2d/pio/textures/Halloween Costume.png": "01038c0f01",
+  "assets/live2d/pio/textures/Hanbok Costume Pink.png": "e470033d12",
+  "assets/live2d/pio/textures/Hanbok Costume Red.png": "57332d1916",
+  "assets/live2d/pio/textures/Hanbok Costume Skyblue.png": "5b83902d7d",
+  "assets/live2d/pio/textures/Hanbok Costume Yellow.png": "a8da3e3a32",
+  "assets/live2d/pio/textures/Hanbok Costume.png": "2e844222b4",
+  "assets/live2d/pio/textures/Healer Costume.png": "f450b66572",
+  "assets/live2d/pio/textures/Kids Costume Navy.png": "da525a220b",
+  "assets/live2d/pio/textures/Kids Costume.png": "5c41900415",
+  "assets/live2d/pio/textures/Literature Girl Costume Brown.png": "7d651c0599",
+  "assets/live2d/pio/textures/Literature Girl Costume Navy.png": "ddb5af511b",
+  "assets/live2d/pio/textures/Lolita Costume Red.png": "5c980c1e6d",
+  "assets/live2d/pio/textures/Lolita Costume Skyblue.png": "50254f7eb8",
+  "assets/live2d/pio/textures/Magical Girl Costume Pink.png": "3c4ddd2c09",
+  "assets/live2d/pio/textures/Magical Girl Costume Purple.png": "c46afe41c5",
+  "assets/live2d/pio/textures/Maid Costume Red.png": "fcee0bcc77",
+  "assets/live2d/pio/textures/Maid Costume.png": "25d57fbb21",
+  "assets/live2d/pio/textures/Marine Costume Navy.png": "ad9827384e",
+  "assets/live2d/pio/textures/Marine Costume White.png": "aabafa4dca",
+  "assets/live2d/pio/textures/New2015 Costume Pajamas.png": "7a03b19ea0",
+  "assets/live2d/pio/textures/New2015 Costume.png": "6e440a5d9e",
+  "assets/live2d/pio/textures/Night Witch Costume Black.png": "f4939940fa",
+  "assets/live2d/pio/textures/Night Witch Costume Gray.png": "8b33766f35",
+  "assets/live2d/pio/textures/Nightsky Costume.png": "5ffcc51542",
+  "assets/live2d/pio/textures/Overalls Costume White.png": "5bc28789c8",
+  "assets/live2d/pio/textures/Overalls Costume.png": "1aea32fcc6",
+  "assets/live2d/pio/textures/Pajamas Costume Pink.png": "b934044257",
+  "assets/live2d/pio/textures/Party Dress Costume Brown.png": "e4bedd280f",
+  "assets/live2d/pio/textures/Party Dress Costume Purple.png": "4fec4fa7c7",
+  "assets/live2d/pio/textures/Priest Costume Junior.png": "b72ef955f3",
+  "assets/live2d/pio/textures/Priest Costume Senior.png": "0119103b09",
+  "assets/live2d/pio/textures/Qipao Costume Pink.png": "5f422fc582",
+  "assets/live2d/pio/textures/Qipao Costume Red.png": "084d708163",
+  "assets/live2d/pio/textures/Ribbon Dress Costume Red.png": "d0cd390b12",
+  "assets/live2d/pio/textures/Ribbon Dress Costume Yellow.png": "341ce9e72b",
+  "assets/live2d/pio/textures/SFC Uniform Costume Red.png": "4a2df0859c",
+  "assets/live2d/pio/textures/SFC Uniform Costume Yellow.png": "aec598f170",
+  "assets/live2d/pio/textures/Sailor Costume Black.png": "3688ccc4a5",
+  "assets/live2d/pio/textures/Sailor Costume.png": "b126bec8d1",
+  "assets/live2d/pio/textures/Sakura Costume Navy.png": "a139db185a",
+  "assets/live2d/pio/textures/Sakura Costume.png": "a09efae697",
+  "assets/live2d/pio/textures/Sakura Fairy Costume Real.png": "f468e4e6f0",
+  "assets/live2d/pio/textures/Sakura Fairy Costume.png": "f051d1d1ce",
+  "assets/live2d/pio/textures/Santa 2018 Costume Green.png": "754136d955",
+  "assets/live2d/pio/textures/Santa 2018 Costume Red.png": "d41fe97dc3",
+  "assets/live2d/pio/textures/Santa Costume Green.png": "97004243c5",
+  "assets/live2d/pio/textures/Santa Costume.png": "6c96bfbdbd",
+  "assets/live2d/pio/textures/Sarori Costume.png": "acf7ec47b6",
+  "assets/live2d/pio/textures/School 2017 Costume Gray.png": "ffde6baf2d",
+  "assets/live2d/pio/textures/School 2017 Costume Yellow.png": "3da9f9baa4",
+  "assets/live2d/pio/textures/School 2019 Costume Black.png": "ff420a6e96",
+  "assets/live2d/pio/textures/School 2019 Costume Pink.png": "75daaac6c6",
+  "assets/live2d/pio/textures/School Costume Red.png": "e372a188aa",
+  "assets/live2d/pio/textures/Shaman Costume Black.png": "0f3aeb7deb",
+  "assets/live2d/pio/textures/Shaman Costume Blue.png": "3474f91285",
+  "assets/live2d/pio/textures/Sinsiroad Costume.png": "b0f6ecc8e6",
+  "assets/live2d/pio/textures/Sinsiroad Shop Costume Junior.png": "9cb2d51fe3",
+  "assets/live2d/pio/textures/Sinsiroad Shop Costume Senior.png": "553ade22a8",
+  "assets/live2d/pio/textures/Sorceress Costume.png": "19ac9af5ef",
+  "assets/live2d/pio/textures/Sporty Hood Costume Black.png": "a4fa6733dc",
+  "assets/live2d/pio/textures/Sporty Hood Costume Blue.png": "e76be70c8b",
+  "assets/live2d/pio/textures/Star Witch Costume Brown.png": "464abbc81b",
+  "assets/live2d/pio/textures/Star Witch Costume.png": "94a62a2ba9",
+  "assets/live2d/pio/textures/Succubus Costume Black.png": "0f719a7147",
+  "assets/live2d/pio/textures/Succubus Costume Red.png": "4db065f3e1",
+  "assets/live2d/pio/textures/Sukumizu Costume White.png": "d4aca351be",
+  "assets/live2d/pio/textures/Sukumizu Costume.png": "27555e86b8",
+  "assets/live2d/pio/textures/Summer Dress Costume Blue.png": "5e30418117",
+  "assets/live2d/pio/textures/Summer Dress Costume White.png": "1fac033163",
+  "assets/live2d/pio/textures/Summer Uniform Costume Blue.png": "da71e6bf30",
+  "assets/live2d/pio/textures/Summer Uniform Costume Red.png": "e553cc0be8",
+  "assets/live2d/pio/textures/Swimsuit 2017 Costume Navy.png": "8ec63a5932",
+  "assets/live2d/pio/textures/Swimsuit 2017 Costume Red.png": "56b3d4f0c1",
+  "assets/live2d/pio/textures/Tirami1 Costume.png": "3291a25658",
+  "assets/live2d/pio/textures/Turtleneck Costume Red.png": "c216867f81",
+  "assets/live2d/pio/textures/Turtleneck Costume.png": "df6d106f05",
+  "assets/live2d/pio/textures/Valentine Costume Brown.png": "bc2e55395d",
+  "assets/live2d/pio/textures/Valentine Costume Pink.png": "f4a8fcd327",
+  "assets/live2d/pio/textures/Vampire Costume Real.png": "df4a8dee3f",
+  "assets/live2d/pio/textures/Vampire Costume.png": "8c2372de8d",
+  "assets/live2d/pio/textures/Voice Story Costume.png": "9efd32dec1",
+  "assets/live2d/pio/textures/Whiteday Costume Purple.png": "fd4908655c",
+  "assets/live2d/pio/textures/Whiteday Costume Red.png": "dad944a0c0",
+  "assets/live2d/pio/textures/Winter Coat 2017 Costume Brown.png": "30e9165c79",
+  "assets/live2d/pio/textures/Winter Coat 2017 Costume White.png": "ee72386cd1",
+  "assets/live2d/pio/textures/Winter Coat Costume Pink.png": "cdff3a5558",
+  "assets/live2d/pio/textures/Winter Coat Costume White.png": "402b51a6b8",
+  "assets/live2d/pio/textures/Winter Costume White.png": "c042dd2e04",
+  "assets/live2d/pio/textures/Winter Costume.png": "288f4c32ae",
+  "assets/live2d/pio/textures/Winter Fairy Costume Black.png": "fa83c45d0c",
+  "assets/live2d/pio/textures/Winter Fairy Costume Pink.png": "3779e10ef7",
+  "assets/live2d/pio/textures/Witch Costume Special.png": "238ba46c81",
+  "assets/live2d/pio/textures/Witch Costume White.png": "1dc3bb51e1",
+  "assets/live2d/pio/textures/Witch Costume.png": "380726c954",
+  "assets/live2d/pio/textures/default-costume.png": "4652f932b3",
+  "assets/live2d/pio/textures/pajamas-costume.png": "1e1a227cec",
+  "assets/live2d/pio/textures/school-costume.png": "09514d7827"
+};
+const PRECACHE = [
+  "assets/css/style.min.css",
+  "assets/img/Help.cur",
+  "assets/img/Link.cur",
+  "assets/img/Move.cur",
+  "assets/img/Normal.cur",
+  "assets/img/Text.cur",
+  "assets/js/L2Dwidget.0.min.js",
+  "assets/js/L2Dwidget.min.js",
+  "assets/js/main.min.js",
+  "assets/live2d/pio/model.json",
+  "assets/live2d/pio/model.moc",
+  "assets/live2d/pio/textures.json",
+  "assets/live2d/pio/textures/default-costume.png"
+];
+
+const versionedUrl = path => new URL(`${path}?v=${ASSETS[path]}`, self.location).href;
+const current = new Set(Object.keys(ASSETS).map(versionedUrl));
+
+self.addEventListener('install', event => {
+  event.waitUntil(
+    caches.open(CACHE_NAME)
+      .then(cache => Promise.all(PRECACHE.map(path => {
+        const url = versionedUrl(path);
+        return cache.match(url).then(hit => hit || cache.add(url));
+      })))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', event => {
+  // Drop superseded versions; unchanged files stay cached across deploys
+  event.waitUntil(
+    caches.open(CACHE_NAME)
+      .then(cache => cache.keys().then(requests => Promise.all(
+        requests.filter(request => !current.has(request.url)).map(request => cache.delete(request))
+      )))
+      .then(() => self.clients.claim())
+  );
+});
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  if (request.method !== 'GET') return;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+
+  const path = decodeURIComponent(url.pathname).replace(/^\//, '');
+  if (!(path in ASSETS)) return;
+
+  // Any reference to a known file (versioned or not) is served at its current version
+  const key = versionedUrl(path);
+  event.respondWith(
+    caches.open(CACHE_NAME).then(cache => cache.match(key).then(hit => hit || fetch(key).then(response => {
+      if (response.ok) cache.put(key, response.clone());
+      return response;
+    })))
+  );
+});
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Optional build daemon: keeps the converter warm between builds.
+
+`manage.py daemon start` launches this module in the background. It imports
+convert (Markdown, the extensions, Pygments), loads the template and the
+common lexers once, and then serves build requests on SOCKET_PATH, a Unix
+socket under .build/. `manage.py build` and `convert.py` call build() first;
+it returns False when no daemon answers, and the caller builds in-process as
+before.
+
+Requests are one JSON object per line; the daemon replies with
+{"output": line} messages (the build's console output, printed by the
+client as it arrives) and a final {"ok": ...} message. Builds are handled
+one at a time. The daemon only serves the directory it was started in, and
+it shuts itself down (the client then falls back) as soon as any of the
+tools/ sources it has loaded changes on disk, so it never builds with
+outdated code.
+
+This module deliberately doesn't import the converter at the top, so the
+client side costs nothing.
+"""
+import os
+import io
+import sys
+import json
+import time
+import socket
+import argparse
+import traceback
+import subprocess
+
+SOCKET_PATH = os.path.join(".build", "daemon.sock")
+PID_PATH = os.path.join(".build", "daemon.pid")
+LOG_PATH = os.path.join(".build", "daemon.log")
+START_TIMEOUT = 30
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Lexers loaded up front so the first post using them doesn't pay for the import
+WARM_LEXERS = ("bash", "python", "c", "javascript", "powershell", "sql", "php", "text")
+
+
+def supported():
+    return hasattr(socket, "AF_UNIX")
+
+
+def _connect():
+    if not supported() or not os.path.exists(SOCKET_PATH):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(SOCKET_PATH)
+    except OSError:
+        sock.close()
+        return None  # A socket file left behind by a daemon that died
+    return sock
+
+
+def request(message, echo=True):
+    """
+    Sends one request. Returns the daemon's final reply, or None when no
+    daemon is listening. With echo, forwarded output is printed on the way.
+    """
+    sock = _connect()
+    if sock is None:
+        return None
+    with sock, sock.makefile("rwb") as stream:
+        stream.write(json.dumps(dict(message, cwd=os.getcwd())).encode("utf-8") + b"\n")
+        stream.flush()
+        for line in stream:
+            reply = json.loads(line)
+            if "output" in reply:
+                if echo:
+                    print(reply["output"], flush=True)
+                continue
+            return reply
+    return None
+
+
+def build(files, force=False, jobs=1, compress=False, minify_outputs=True):
+    """
+    Asks a running daemon to run convert.build(). Returns True when it did,
+    False when the caller has to build in-process. Raises RuntimeError when
+    the daemon ran the build and it failed.
+    """
+    reply = request({
+        "command": "build",
+        "files": list(files),
+        "force": force,
+        "jobs": jobs,
+        "compress": compress,
+        "minify": minify_outputs,
+    })
+    if reply is None:
+        return False
+    if reply.get("stale"):
+        print("[!] Build daemon stopped: its code changed since it started. Building in-process "
+              "(run `manage.py daemon start` again to get it back).")
+        return False
+    if reply.get("wrong_root"):
+        print(f"[!] Build daemon serves {reply['root']}, not this directory. Building in-process.")
+        return False
+    if not reply.get("ok"):
+        raise RuntimeError(reply.get("error", "unknown error"))
+    print(f"[*] Built by the daemon (pid {reply['pid']}) in {reply['seconds']:.2f}s.")
+    return True
+
+
+def status():
+    return request({"command": "status"}, echo=False)
+
+
+def stop():
+    return request({"command": "stop"}, echo=False)
+
+
+def start():
+    """Launches the daemon in the background and waits until it answers. Returns its status."""
+    current = status()
+    if current:
+        return current
+    os.makedirs(os.path.dirname(SOCKET_PATH), exist_ok=True)
+    if os.path.exists(SOCKET_PATH):
+        os.remove(SOCKET_PATH)
+    with open(LOG_PATH, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "serve"],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True,
+        )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        current = status()
+        if current:
+            return current
+        time.sleep(0.1)
+    return None
+
+
+# Daemon side
+
+def _source_stamps():
+    stamps = {}
+    for name in sorted(os.listdir(TOOLS_DIR)):
+        if name.endswith(".py"):
+            path = os.path.join(TOOLS_DIR, name)
+            stamps[path] = os.stat(path).st_mtime_ns
+    return stamps
+
+
+class _Forward(io.TextIOBase):
+    """Sends everything printed during a build to the client, one line per message."""
+
+    def __init__(self, send):
+        self.send = send
+        self.pending = ""
+
+    def write(self, text):
+        self.pending += text
+        while "\n" in self.pending:
+            line, self.pending = self.pending.split("\n", 1)
+            self.send({"output": line})
+        return len(text)
+
+    def flush(self):
+        if self.pending:
+            self.send({"output": self.pending})
+            self.pending = ""
+
+
+def warm_up():
+    """Loads everything a build needs, so the first request is as fast as the rest."""
+    import convert
+    import templating
+    convert.get_markdown()
+    if os.path.exists(convert.TEMPLATE_PATH):
+        templating.load(convert.TEMPLATE_PATH)
+    try:
+        from pygments.lexers import get_lexer_by_name
+        for name in WARM_LEXERS:
+            get_lexer_by_name(name)
+    except Exception:
+        pass
+    return convert
+
+
+def serve():
+    """Runs the daemon in the foreground until a stop request or a code change."""
+    import socketserver
+    from contextlib import redirect_stdout
+
+    root = os.getcwd()
+    stamps = _source_stamps()
+    started = time.time()
+    convert = warm_up()
+    served = 0
+
+    class Handler(socketserver.StreamRequestHandler):
+        def send(self, message):
+            try:
+                self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+                self.wfile.flush()
+            except OSError:
+                pass  # Client went away; finish the build anyway
+
+        def handle(self):
+            nonlocal served
+            message = json.loads(self.rfile.readline() or b"{}")
+            command = message.get("command")
+            if command == "status":
+                self.send({"ok": True, "pid": os.getpid(), "root": root, "uptime": time.time() - started, "builds": served})
+            elif command == "stop":
+                self.server.stopping = True
+                self.send({"ok": True, "pid": os.getpid()})
+            elif command == "build":
+                if message.get("cwd") != root:
+                    self.send({"ok": False, "wrong_root": True, "root": root})
+                elif _source_stamps() != stamps:
+                    self.server.stopping = True
+                    self.send({"ok": False, "stale": True})
+                else:
+                    self.run_build(message)
+                    served += 1
+            else:
+                self.send({"ok": False, "error": f"unknown command {command!r}"})
+
+        def run_build(self, message):
+            begun = time.perf_counter()
+            forward = _Forward(self.send)
+            try:
+                with redirect_stdout(forward):
+                    convert.build(
+                        message["files"], force=message.get("force", False), jobs=message.get("jobs", 1),
+                        compress=message.get("compress", False), minify_outputs=message.get("minify", True),
+                    )
+                forward.flush()
+            except Exception as e:
+                forward.flush()
+                traceback.print_exc()
+                self.send({"ok": False, "error": f"{type(e).__name__}: {e}"})
+                return
+            self.send({"ok": True, "pid": os.getpid(), "seconds": time.perf_counter() - begun})
+
+    if os.path.exists(SOCKET_PATH):
+        os.remove(SOCKET_PATH)
+    server = socketserver.UnixStreamServer(SOCKET_PATH, Handler)
+    server.stopping = False
+    with open(PID_PATH, "w", encoding="utf-8") as f:
+        f.write(f"{os.getpid()}\n")
+    print(f"[*] Build daemon {os.getpid()} listening on {SOCKET_PATH} for {root}", flush=True)
+    try:
+        while not server.stopping:
+            server.handle_request()
+    finally:
+        server.server_close()
+        for path in (SOCKET_PATH, PID_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+        print(f"[*] Build daemon {os.getpid()} stopped after {served} build(s).", flush=True)
+
+
+def control(action):
+    """start / stop / status, as run by `manage.py daemon` (exits 1 on failure)."""
+    if not supported():
+        print("[-] The build daemon needs Unix domain sockets, which this platform lacks.")
+        sys.exit(1)
+    if action == "start":
+        current = start()
+        if not current:
+            print(f"[-] Build daemon did not come up; see {LOG_PATH}.")
+            sys.exit(1)
+        print(f"[+] Build daemon running (pid {current['pid']}). Builds will use it until it is stopped.")
+    elif action == "stop":
+        print("[+] Build daemon stopped." if stop() else "[*] No build daemon running.")
+    else:
+        current = status()
+        if not current:
+            print("[*] No build daemon running.")
+            sys.exit(1)
+        print(f"[+] Build daemon pid {current['pid']} serving {current['root']}, "
+              f"up {current['uptime']:.0f}s, {current['builds']} build(s) done.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm build daemon for convert.py")
+    parser.add_argument("action", choices=("serve", "start", "stop", "status"),
+                        help="serve runs the daemon in the foreground; the rest control a background one")
+    args = parser.parse_args()
+    if args.action == "serve":
+        serve()
+    else:
+        control(args.action)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import os
 import sys
 import re
-import datetime
-import shutil
-import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from xml.sax.saxutils import escape
+import json
+from html import unescape
 
 # Try importing markdown, else warn user
 try:
@@ -14,21 +17,45 @@ except ImportError:
     print("[-] Please install it using: pip install markdown")
     sys.exit(1)
 
+import hilite_cache
+import image_store
+import image_variants
+import links
+import postprocess
+import templating
+import post_index
+import indexes
+import static_assets
+import precompress
+import minify
+import output
+import timings
+from post_index import parse_frontmatter
+from indexes import BASE_URL
+
 TEMPLATE_PATH = "templates/writeup-template.html"
 OUTPUT_DIR = "writeups"
-ASSETS_IMG_DIR = "assets/img"
-BASE_URL = "https://alterpix.github.io"
+
+MARKDOWN_EXTENSIONS = ['extra', 'codehilite', 'fenced_code', 'toc']
+# Heading ids are made the way links.parse makes [[post#heading]] fragments
+MARKDOWN_EXTENSION_CONFIGS = {'toc': {'slugify': links.slugify}}
+
+# Incremental build state (not published)
+BUILD_DIR = ".build"
+MANIFEST_PATH = os.path.join(BUILD_DIR, "manifest.json")
+# Broken links printed by a build (`manage.py check-links` lists them all)
+BROKEN_LINKS_SHOWN = 20
+# Bump when the output format changes in a way the source hash of this file can't see
+CONVERTER_VERSION = "1"
 
 def process_images(md_content, source_file_path):
     """
-    Finds image references in markdown, copies images to assets/img,
-    and updates the markdown to use correct relative paths.
+    Finds image references in markdown, publishes the images to assets/img
+    under content-hashed names (see image_store) and updates the markdown to
+    use the published paths.
     """
     source_dir = os.path.dirname(os.path.abspath(source_file_path))
     
-    if not os.path.exists(ASSETS_IMG_DIR):
-        os.makedirs(ASSETS_IMG_DIR)
-    
     image_pattern = r'!\[([^\]]*)\]\(([^)]+)\)'
     
     def replace_image_path(match):
@@ -49,99 +76,55 @@ def process_images(md_content, source_file_path):
             print(f"[!] Warning: Image not found: {source_image_path}")
             return match.group(0)
         
-        image_filename = os.path.basename(source_image_path)
-        dest_image_path = os.path.join(ASSETS_IMG_DIR, image_filename)
-        
         try:
-            shutil.copy2(source_image_path, dest_image_path)
-            print(f"[+] Copied image: {image_filename} -> {ASSETS_IMG_DIR}/")
+            public_path = image_store.publish(source_image_path)
         except Exception as e:
-            print(f"[!] Error copying image {image_filename}: {e}")
+            print(f"[!] Error publishing image {os.path.basename(source_image_path)}: {e}")
             return match.group(0)
         
-        new_path = f"../assets/img/{image_filename}"
+        new_path = f"../{public_path}"
         return f"![{alt_text}]({new_path})"
     
     updated_content = re.sub(image_pattern, replace_image_path, md_content)
     return updated_content
 
-def parse_frontmatter(content):
+def generate_image_variants(md_content):
     """
-    Extracts YAML-style frontmatter from the markdown content.
-    Returns metadata dict and the remaining markdown content.
+    Builds the responsive derivatives (see image_variants) of every published
+    image the markdown references, so the HTML rewrite and the SEO tags can
+    point at them. Runs inside the build worker converting the post.
     """
-    meta = {
-        "title": "Untitled Writeup",
-        "date": datetime.date.today().strftime("%Y-%m-%d"),
-        "category": "General",
-        "author": "Alterpix",
-        "description": "",
-        "tags": ""
-    }
-    
-    frontmatter_pattern = r"^---\s+(.*?)\s+---\s+(.*)$"
-    match = re.search(frontmatter_pattern, content, re.DOTALL)
-    
-    if match:
-        frontmatter_str = match.group(1)
-        markdown_content = match.group(2)
-        
-        for line in frontmatter_str.split("\n"):
-            if ":" in line:
-                key, value = line.split(":", 1)
-                meta[key.strip().lower()] = value.strip().strip('"').strip("'")
-        
-        # Auto-generate description if missing
-        if not meta["description"]:
-            # Basic heuristic: take first non-empty paragraph
-            paragraphs = [p.strip() for p in markdown_content.split('\n\n') if p.strip() and not p.strip().startswith('#') and not p.strip().startswith('!')]
-            if paragraphs:
-                meta["description"] = paragraphs[0][:150] + "..."
-        
-        return meta, markdown_content
-    else:
-        return meta, content
+    for match in re.finditer(r'!\[[^\]]*\]\((\.\./assets/img/[^)\s]+)\)', md_content):
+        image_variants.variants(match.group(1)[len("../"):])
+
+# Long-lived converter state, reused across every file converted by this process.
+# The compiled writeup template is cached by templating.load().
+_markdown = None
+
+def get_markdown():
+    """
+    Returns the process-wide Markdown instance, creating it on first use.
+    Building it loads every extension, so it is reset between documents
+    rather than rebuilt.
+    """
+    global _markdown
+    if _markdown is None:
+        # Highlighted code blocks are served from the on-disk cache when possible
+        hilite_cache.install()
+        _markdown = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS, extension_configs=MARKDOWN_EXTENSION_CONFIGS)
+    return _markdown
 
 def convert_to_html(md_content):
     """Converts markdown text to HTML with Terminal Card style for code blocks."""
-    html = markdown.markdown(md_content, extensions=['extra', 'codehilite', 'fenced_code'])
-    
-    pattern = r'(<div class="codehilite">)(.*?)(</div>)'
-    
-    def replacement(match):
-        code_block = match.group(0)
-        content = match.group(2)
-        text_content = re.sub(r'<[^>]+>', '', content)
-        
-        title = "TERMINAL"
-        if "nmap" in text_content or "sudo" in text_content or "$ " in text_content or "bash" in text_content:
-            title = "BASH_SHELL"
-        elif "python" in text_content or "def " in text_content or "print(" in text_content:
-            title = "PYTHON_SCRIPT"
-            
-        return f"""<div class="code-terminal">
-    <div class="terminal-header">
-        <div class="dot red"></div>
-        <div class="dot yellow"></div>
-        <div class="dot green"></div>
-        <div class="title">{title}</div>
-    </div>
-    <div class="terminal-body">{code_block}</div>
-</div>"""
-
-    html = re.sub(pattern, replacement, html, flags=re.DOTALL)
-    
-    # Secure External Links (Reverse SEO / Tabnabbing Protection)
-    def secure_links(match):
-        url = match.group(1)
-        text = match.group(2)
-        if url.startswith("http") and "alterpix.github.io" not in url:
-             return f'<a href="{url}" target="_blank" rel="noopener noreferrer">{text}</a>'
-        return match.group(0) # Internal or relative
-        
-    final_html = re.sub(r'<a href="(.*?)">(.*?)</a>', secure_links, html)
+    html = get_markdown().reset().convert(md_content)
+
+    # Terminal cards, external link hardening and redaction styling, in one pass
+    return postprocess.rewrite(html)
 
-    return final_html
+def html_to_text(html_content):
+    """Strips tags and entities from rendered HTML, collapsing whitespace."""
+    text = re.sub(r'<[^>]+>', ' ', html_content)
+    return re.sub(r'\s+', ' ', unescape(text)).strip()
 
 def generate_seo_tags(meta, filename, first_image=None):
     """Generates HTML meta tags for SEO."""
@@ -160,40 +143,20 @@ def generate_seo_tags(meta, filename, first_image=None):
              # We need to strip the "../" and prepend BASE_URL
              clean_path = first_image.replace("../", "")
              image = f"{BASE_URL}/{clean_path}"
+             # Prefer the 1200x630 crop when image_variants produced one
+             variant = image_variants.variants(clean_path)
+             if variant and variant["og"]:
+                 image = f"{BASE_URL}/{variant['og']}"
     else:
         image = f"{BASE_URL}/assets/img/og_default.png"
     
-    seo_html = f"""
-    <meta name="description" content="{description}">
-    <link rel="canonical" href="{url}">
-    
-    <!-- Open Graph / Facebook -->
-    <meta property="og:type" content="article">
-    <meta property="og:url" content="{url}">
-    <meta property="og:title" content="{title}">
-    <meta property="og:description" content="{description}">
-    <meta property="og:image" content="{image}">
-    
-    <!-- Twitter -->
-    <meta property="twitter:card" content="summary_large_image">
-    <meta property="twitter:url" content="{url}">
-    <meta property="twitter:title" content="{title}">
-    <meta property="twitter:description" content="{description}">
-    <meta property="twitter:image" content="{image}">
-    """
-    return seo_html
-
-def process_file(input_file):
-    if not os.path.exists(input_file):
-        print(f"[-] Error: File '{input_file}' not found.")
-        return None
-
-    print(f"[+] Processing {input_file}...")
-    
-    with open(input_file, "r", encoding="utf-8") as f:
-        full_content = f.read()
-    
-    return content
+    seo_html = templating.render_partial("seo", {
+        "description": description,
+        "url": url,
+        "title": title,
+        "image": image,
+    })
+    return f"\n    {seo_html}\n    "
 
 def sanitize_content(content, file_path):
     """
@@ -222,107 +185,90 @@ def sanitize_content(content, file_path):
             
     return content
 
-def style_redactions(html_content):
-    """
-    Replaces [[REDACTED]] text in the HTML output with styled spans.
-    This runs AFTER markdown conversion, so it works even inside code blocks.
-    """
-    redacted_pattern = r'\[\[REDACTED\]\]'
-    replacement = '<span class="redacted" title="[TOP SECRET] DATA EXPUNGED">[SECRET]</span>'
-    return re.sub(redacted_pattern, replacement, html_content)
+# [[filename]], [[filename#heading]], [[filename|text]] or [text](filename.md#heading)
+OBSIDIAN_LINK_PATTERN = links.LINK_PATTERN
+
+def _unresolved_url(match, fragment):
+    """Where a link points without a link index: the file name as written, as .html."""
+    if match.group("wiki") is None:
+        return f'{match.group("path")}.html{fragment}'
+    name = match.group("wiki").partition("|")[0].partition("#")[0].strip()
+    return name.replace(" ", "-").replace(".md", "") + ".html" + fragment if name else fragment
 
-def process_obsidian_links(content):
+def process_obsidian_links(content, index=None, source=None):
     """
     Converts Obsidian-style links [[filename]] and [[filename|text]] 
     and standard markdown links [text](file.md) to HTML links pointing to .html files.
+    All three forms are rewritten in a single pass; [[REDACTED]] is left alone.
+    With a links.LinkIndex, targets are resolved by file name, alias or title
+    and heading fragments become heading ids; wiki links to posts that don't
+    exist are rendered as text marked broken-link.
     """
-    
-    # 1. Handle [[filename|text]] -> <a href="filename.html">text</a>
-    # Ignored if it is [[REDACTED]]
-    
-    # Regex for alias: [[ (?!REDACTED) (.*?) | (.*?) ]]
-    # But wait, [[REDACTED]] doesn't have a pipe usually.
-    # So the alias regex is safe unless user writes [[REDACTED|alias]] which is weird.
-    
-    def replace_wiki_alias(match):
-        filename = match.group(1).strip()
-        text = match.group(2).strip()
-        if "REDACTED" in filename: return match.group(0) # Skip
-        url = filename.replace(" ", "-").replace(".md", "") + ".html"
-        return f'<a href="{url}" class="internal-link">{text}</a>'
-    
-    content = re.sub(r'\[\[(?!REDACTED\|)(.*?)\|(.*?)\]\]', replace_wiki_alias, content)
+    def replace_link(match):
+        parsed = links.parse(match)
+        if parsed is None:
+            return match.group(0) # [[REDACTED]]
+        target, anchor, text = parsed
+        url = index.href(target, anchor, source) if index is not None else None
 
-    # 2. Handle [[filename]] -> <a href="filename.html">filename</a>
-    # Must ignore [[REDACTED]]
-    
-    def replace_wiki_simple(match):
-        filename = match.group(1).strip()
-        if filename == "REDACTED": return match.group(0) # SKIP
-        
-        parts = filename.split('#')
-        base = parts[0]
-        fragment = f"#{parts[1]}" if len(parts) > 1 else ""
-        
-        url = base.replace(" ", "-").replace(".md", "") + ".html" + fragment
-        text = base
+        if match.group("wiki") is None:
+            # Standard markdown link: only the target changes
+            url = url or _unresolved_url(match, match.group("fragment") or "")
+            return f'[{match.group("text")}]({url})'
+
+        if url is None and index is not None:
+            return f'<span class="internal-link broken-link">{text}</span>'
+        url = url or _unresolved_url(match, f"#{anchor}" if anchor else "")
         return f'<a href="{url}" class="internal-link">{text}</a>'
 
-    # Regex: [[ (item) ]] where item is NOT REDACTED
-    # easier to use the callback to filter
-    content = re.sub(r'\[\[(.*?)\]\]', replace_wiki_simple, content)
+    return OBSIDIAN_LINK_PATTERN.sub(replace_link, content)
 
-    # 3. Handle standard markdown links [text](filename.md) -> [text](filename.html)
-    def replace_std_md_link(match):
-        return match.group(0).replace(".md", ".html")
-    
-    content = re.sub(r'\[.*?\]\(.*?.md\)', replace_std_md_link, content)
-    
-    return content
+def render_backlinks(backlinks):
+    """The backlinks partial listing [(title, filename)], or "" when nothing links here."""
+    if not backlinks:
+        return ""
+    items = "\n".join(
+        f'<li><a href="{escape(filename)}" class="internal-link">{escape(title)}</a></li>'
+        for title, filename in backlinks
+    )
+    return f"\n                {templating.render_partial('backlinks', {'items': items})}"
 
-def process_file(input_file):
-    if not os.path.exists(input_file):
-        print(f"[-] Error: File '{input_file}' not found.")
-        return None
+# The link index of the current build (see get_link_index)
+_link_index = None
 
-    print(f"[+] Processing {input_file}...")
-    
-    with open(input_file, "r", encoding="utf-8") as f:
-        full_content = f.read()
-    
-    meta, md_content = parse_frontmatter(full_content)
-    md_content = process_images(md_content, input_file)
-    
-    # 1. Sanitize Secrets (Permanent File Update)
-    md_content = sanitize_content(md_content, input_file)
-    
-    # 2. Process Obsidian Links (Ignores [[REDACTED]])
-    md_content = process_obsidian_links(md_content)
-    
+def set_link_index(index):
+    global _link_index
+    _link_index = index
+
+def get_link_index(stamp=None):
+    """
+    Returns the link index, loading it from the metadata index when this
+    process has none yet or holds an older one than stamp (a pool worker
+    started by an earlier build).
+    """
+    global _link_index
+    if _link_index is None or (stamp is not None and _link_index.stamp != stamp):
+        conn = post_index.connect()
+        try:
+            _link_index = post_index.link_index(conn)
+        finally:
+            conn.close()
+    return _link_index
+
+def page_context(meta, md_content, html_content, filename, backlinks):
+    """
+    The writeup template's slots for one post. md_content is the processed
+    markdown (its first image becomes the og:image), html_content the rendered
+    body and backlinks the [(title, filename)] of the posts linking to it.
+    """
     # Extract first image from the PROCESSED markdown
     image_pattern = r'!\[.*?\]\((.*?)\)'
     image_match = re.search(image_pattern, md_content)
     first_image = image_match.group(1) if image_match else None
-    
-    # 3. Convert to HTML
-    html_content = convert_to_html(md_content)
-    
-    # 4. Apply Redaction Styles (After HTML conversion to avoid escaping issues in code blocks)
-    html_content = style_redactions(html_content)
-    
-    if not os.path.exists(TEMPLATE_PATH):
-        print(f"[-] Error: Template '{TEMPLATE_PATH}' not found.")
-        return None
 
-    with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
-        template = f.read()
-    
-    filename = os.path.basename(input_file).replace(".md", ".html")
-    
     # Generate SEO Tags
     seo_tags = generate_seo_tags(meta, filename, first_image)
     
-    # Generate Disclaimer if needed
     # Generate Disclaimer if needed
     sensitive_cats = ["CTF", "HACKING", "SECURITY", "EXPLOIT", "MALWARE", "RED TEAM"]
     current_cat = meta.get("category", "").upper()
@@ -335,16 +281,7 @@ def process_file(input_file):
                    any(tag in current_tags for tag in sensitive_cats)
     
     if is_sensitive:
-        disclaimer_html = """
-        <div class="legal-warning">
-            <div class="warning-icon">⚠️ WARNING_</div>
-            <p>
-                <strong>DISCLAIMER:</strong> Materi ini dibuat semata-mata untuk tujuan <strong>EDUKASI</strong> dan keamanan siber.
-                Penulis tidak bertanggung jawab atas segala bentuk penyalahgunaan informasi yang ada di sini.
-                Menguji teknik ini pada sistem tanpa izin eksplisit adalah tindakan <strong>ILEGAL</strong>.
-            </p>
-        </div>
-        """
+        disclaimer_html = f"\n        {templating.render_partial('disclaimer', {})}\n        "
     
     # Inject Metadata
     title_text = meta.get("title", "Untitled")
@@ -355,181 +292,372 @@ def process_file(input_file):
     else:
         page_title = f"WRITEUP_LOG | {title_text}"
         
-    output_html = template.replace("[PAGE_TITLE]", page_title)
-    output_html = output_html.replace("[TITLE]", title_text) # Keep for other uses if any
-    output_html = output_html.replace("[WRITEUP TITLE HERE]", title_text)
-    output_html = output_html.replace("[YYYY-MM-DD]", meta.get("date", "YYYY-MM-DD"))
-    output_html = output_html.replace("[WEB/NETWORK/CTF]", meta.get("category", "Uncategorized"))
-    output_html = output_html.replace("[AUTHOR]", meta.get("author", "Alterpix"))
-    output_html = output_html.replace("<!-- SEO_TAGS_PLACEHOLDER -->", seo_tags)
-    output_html = output_html.replace("<!-- DISCLAIMER_PLACEHOLDER -->", disclaimer_html)
+    return {
+        "page_title": page_title,
+        "title": title_text,
+        "date": meta.get("date") or "----",
+        "category": meta.get("category", "Uncategorized"),
+        "author": meta.get("author", "Alterpix"),
+        "seo_tags": seo_tags,
+        "disclaimer": disclaimer_html,
+        "content": html_content,
+        "backlinks": render_backlinks(backlinks),
+    }
+
+def process_file(input_file, minify_html=True, links_stamp=None):
+    if not os.path.exists(input_file):
+        print(f"[-] Error: File '{input_file}' not found.")
+        return None
+
+    print(f"[+] Processing {input_file}...")
+    # Per-stage timings, returned with the metadata (see timings)
+    clock = timings.Clock(input_file)
+    
+    with open(input_file, "r", encoding="utf-8") as f:
+        full_content = f.read()
+    clock.bytes_read += os.path.getsize(input_file)
+    clock.lap("read")
+    
+    meta, md_content = parse_frontmatter(full_content)
+    clock.lap("parse_frontmatter")
+    md_content = process_images(md_content, input_file)
+    clock.lap("process_images")
+    generate_image_variants(md_content)
+    clock.lap("image_variants")
+    
+    # 1. Sanitize Secrets (Permanent File Update)
+    md_content = sanitize_content(md_content, input_file)
+    clock.lap("sanitize_content")
+    
+    # 2. Process Obsidian Links (Ignores [[REDACTED]])
+    source = os.path.normpath(input_file)
+    link_index = get_link_index(links_stamp)
+    md_content = process_obsidian_links(md_content, link_index, source)
+    clock.lap("obsidian_links")
+    
+    # 3. Convert to HTML (redaction styles are applied after conversion, in postprocess)
+    html_content = convert_to_html(md_content)
+    clock.lap("convert_to_html")
     
-    # Inject Content
-    output_html = output_html.replace("{{ CONTENT }}", html_content)
+    if not os.path.exists(TEMPLATE_PATH):
+        print(f"[-] Error: Template '{TEMPLATE_PATH}' not found.")
+        return None
+
+    template = templating.load(TEMPLATE_PATH)
+    
+    filename = os.path.basename(input_file).replace(".md", ".html")
+    
+    # Inject Metadata and Content in a single render (injected text is never rescanned)
+    output_html = template.render(
+        page_context(meta, md_content, html_content, filename, link_index.backlinks_of(source))
+    )
+    clock.lap("render")
     
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
 
     output_path = os.path.join(OUTPUT_DIR, filename)
     
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(output_html)
+    if minify_html:
+        minified = minify.cached("html", output_html)
+        minify.report(output_path, output_html, minified)
+        output_html = minified
+        clock.lap("minify")
+    
+    written = output.write(output_path, output_html)
+    if written:
+        clock.bytes_written += os.path.getsize(output_path)
+    clock.lap("write")
     
-    print(f"[+] Successfully generated: {output_path}")
+    print(f"[+] Successfully generated: {output_path}" + ("" if written else " (unchanged)"))
     
     # Return metadata for Sitemap/RSS
     meta['filename'] = filename
     meta['url'] = f"{BASE_URL}/writeups/{filename}"
+    # Plain text of the rendered body, for the search index (not stored in the manifest)
+    meta['body_text'] = html_to_text(html_content)
+    # Ids links may point at, for the broken-link check (not stored in the manifest either)
+    meta['anchors'] = links.anchors(html_content)
+    clock.lap("html_to_text")
+    meta['timings'] = clock.record()
+    # Whether the output changed, for the parent's output counts (see process_files)
+    meta['output_written'] = written
     return meta
 
-def generate_sitemap(posts):
-    """Generates sitemap.xml"""
-    sitemap = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    sitemap += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-    
-    # Add root
-    sitemap += f'  <url>\n    <loc>{BASE_URL}/</loc>\n    <changefreq>daily</changefreq>\n    <priority>1.0</priority>\n  </url>\n'
-    
-    today = datetime.date.today().strftime("%Y-%m-%d")
-    
-    for post in posts:
-        sitemap += f'  <url>\n    <loc>{post["url"]}</loc>\n    <lastmod>{post.get("date", today)}</lastmod>\n    <changefreq>monthly</changefreq>\n    <priority>0.8</priority>\n  </url>\n'
-    
-    sitemap += '</urlset>'
-    
-    with open("sitemap.xml", "w", encoding="utf-8") as f:
-        f.write(sitemap)
-    print(f"[+] Generated sitemap.xml with {len(posts)} posts.")
-
-def generate_rss(posts):
-    """Generates feed.xml"""
-    rss = '<?xml version="1.0" encoding="UTF-8" ?>\n'
-    rss += '<rss version="2.0">\n'
-    rss += '<channel>\n'
-    rss += f'  <title>Alterpix Writeups</title>\n'
-    rss += f'  <link>{BASE_URL}</link>\n'
-    rss += f'  <description>Cyber Security Writeups & Tutorials</description>\n'
-    
-    for post in posts:
-        rss += '  <item>\n'
-        rss += f'    <title>{escape(post["title"])}</title>\n'
-        rss += f'    <link>{post["url"]}</link>\n'
-        rss += f'    <description>{escape(post.get("description", ""))}</description>\n'
-        rss += f'    <pubDate>{post.get("date")}</pubDate>\n'
-        rss += '  </item>\n'
-    
-    rss += '</channel>\n</rss>'
-    
-    with open("feed.xml", "w", encoding="utf-8") as f:
-        f.write(rss)
-    print(f"[+] Generated feed.xml with {len(posts)} posts.")
+def file_hash(path):
+    """Returns the sha256 hex digest of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
-import json
+def converter_version():
+    """
+    Version stamp for the manifest. Combines CONVERTER_VERSION, the hashes of
+    this script and the helper modules that shape its output, the markdown
+    version and the image variant settings, so editing the converter
+    invalidates every cached post without anyone having to remember to bump a
+    number.
+    """
+    h = hashlib.sha256()
+    for path in [__file__] + [m.__file__ for m in (postprocess, templating, image_store, image_variants, minify, links)]:
+        h.update(file_hash(os.path.abspath(path)).encode("ascii"))
+    h.update(image_variants.settings_key().encode("utf-8"))
+    return f"{CONVERTER_VERSION}-{h.hexdigest()[:16]}-{markdown.__version__}"
 
-def generate_json_index(posts):
-    """Generates posts.json for client-side rendering."""
-    
-    # Sort posts by date (newest first)
-    posts.sort(key=lambda x: x.get('date', '0000-00-00'), reverse=True)
-    
-    # Add ID hash if not present
-    import hashlib
-    for post in posts:
-        if 'id' not in post:
-            post['id'] = hashlib.md5(post['title'].encode()).hexdigest()[:4].upper()
-            
-        # Ensure relative URL
-        if post['url'].startswith(BASE_URL):
-            post['url'] = post['url'].replace(BASE_URL + "/", "")
-            
-    output_path = "posts.json"
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(posts, f, indent=2)
-        
-    print(f"[+] Generated {output_path} with {len(posts)} posts.")
+def template_fingerprint():
+    """Hashes the writeup template together with every partial it may include."""
+    if not os.path.exists(TEMPLATE_PATH):
+        return None
+    h = hashlib.sha256()
+    for path in templating.source_files(TEMPLATE_PATH):
+        h.update(path.encode("utf-8"))
+        h.update(file_hash(path).encode("ascii"))
+    return h.hexdigest()
 
-def generate_noscript_fallback(posts):
-    """Generates static HTML links inside <noscript> for SEO."""
-    
-    html_output = "<h3>:: STATIC_DB_ACCESS ::</h3><ul>"
-    
-    # Sort by date
-    posts.sort(key=lambda x: x.get('date', '0000-00-00'), reverse=True)
-    
-    for post in posts:
-        url = post['url'].replace(BASE_URL + "/", "")
-        title = post['title']
-        date = post.get('date', '----')
-        html_output += f'<li><a href="{url}">[{date}] {title}</a></li>\n'
-    
-    html_output += "</ul>"
-    
-    index_path = "index.html"
-    if os.path.exists(index_path):
-        with open(index_path, "r", encoding="utf-8") as f:
-            content = f.read()
-            
-        marker = "<!-- STATIC_LINKS_PLACEHOLDER -->"
-        if marker in content:
-            new_content = content.replace(marker, html_output)
-            # Or regex replace if we already ran it, but for now simple replacement is fine 
-            # as long as we don't need to update it continuously without a wrapper.
-            # actually, let's use a wrapper strategy like before to be safe for re-runs.
-            
-            # Better strategy: Regex replace the CONTENT of <noscript>...<div class="static-list">...</div>
-            # But the user asked for simple addition. 
-            # To allow updates, let's replace the placeholder with "<!-- STATIC_START --> content <!-- STATIC_END -->"
-            # and verify logical branching.
-            
-            # However, I removed the previous simpler approach. Let's just use the placeholder replacement
-            # but wrapping it so we can find it again?
-            # Actually, `convert.py` is often run multiple times. 
-            # If I replace the placeholder, it's gone.
-            # I need `<!-- STATIC_LINKS_PLACEHOLDER -->` to PERSIST or act as a boundary.
-            
-            pass 
-            
-    # Re-impl with robust replacement
-    if os.path.exists(index_path):
-        with open(index_path, "r", encoding="utf-8") as f:
-            content = f.read()
-            
-        start_marker = "<!-- STATIC_LINKS_START -->"
-        end_marker = "<!-- STATIC_LINKS_END -->"
-        placeholder = "<!-- STATIC_LINKS_PLACEHOLDER -->"
-        
-        injection = f"{start_marker}\n{html_output}\n{end_marker}"
-        
-        # Regex for existing block
-        pattern = re.compile(f"{re.escape(start_marker)}.*?{re.escape(end_marker)}", re.DOTALL)
-        
-        if pattern.search(content):
-            new_content = re.sub(pattern, injection, content)
-            print("[+] Updated existing noscript fallback.")
-        elif placeholder in content:
-            new_content = content.replace(placeholder, injection)
-            print("[+] Injected new noscript fallback.")
-        else:
-            print("[-] Warning: No placeholder found for noscript fallback.")
-            return
+def build_fingerprint(input_file, template_hash, version, links_digest=None):
+    """
+    Hashes everything a post's output depends on: the source, the images it
+    references, the HTML template, the converter version and what its page
+    shows of the link graph (links.LinkIndex.digest).
+    """
+    with open(input_file, "rb") as f:
+        raw = f.read()
 
-        with open(index_path, "w", encoding="utf-8") as f:
-            f.write(new_content)
+    images = {}
+    for image_path in image_store.find_local_images(raw.decode("utf-8", errors="replace"), input_file):
+        images[image_path] = file_hash(image_path) if os.path.exists(image_path) else None
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python3 tools/convert.py <path_to_markdown_file> [more_files...]")
-        sys.exit(1)
-    
-    posts_metadata = []
-    
-    for input_file in sys.argv[1:]:
-        meta = process_file(input_file)
+    return {
+        "source": hashlib.sha256(raw).hexdigest(),
+        "images": images,
+        "template": template_hash,
+        "converter": version,
+        "links": links_digest,
+    }
+
+def load_manifest():
+    """Loads the build manifest, or an empty one if missing or unreadable."""
+    if os.path.exists(MANIFEST_PATH):
+        try:
+            with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if isinstance(manifest.get("posts"), dict):
+                return manifest
+        except (OSError, ValueError) as e:
+            print(f"[!] Warning: Ignoring unreadable build manifest: {e}")
+    return {"posts": {}}
+
+def save_manifest(manifest):
+    if not os.path.exists(BUILD_DIR):
+        os.makedirs(BUILD_DIR)
+    output.write(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True))
+
+def is_up_to_date(entry, fingerprint):
+    """A post can be skipped when its fingerprint matches and its output still exists."""
+    if not entry or entry.get("fingerprint") != fingerprint:
+        return False
+    filename = entry.get("meta", {}).get("filename")
+    return bool(filename) and os.path.exists(os.path.join(OUTPUT_DIR, filename))
+
+def resolve_jobs(jobs):
+    """Maps the --jobs value to a worker count; 0 means one per CPU."""
+    if not jobs or jobs < 0:
+        return os.cpu_count() or 1
+    return jobs
+
+def process_files(input_files, jobs=1, minify_html=True, profile_dir=None, links_stamp=None):
+    """
+    Runs process_file over the given files, fanning out over a process pool
+    when jobs > 1. Results come back in input order regardless of which
+    worker finishes first. With profile_dir, workers profile every task into
+    that directory (see timings.profiling). links_stamp identifies the link
+    index workers must use (see get_link_index).
+    """
+    jobs = min(resolve_jobs(jobs), len(input_files))
+    if jobs <= 1:
+        return [process_file(f, minify_html, links_stamp) for f in input_files]
+
+    # Flush so forked workers do not inherit (and repeat) buffered output
+    print(f"[*] Converting {len(input_files)} post(s) with {jobs} workers...", flush=True)
+    task = partial(process_file, minify_html=minify_html, links_stamp=links_stamp)
+    if profile_dir:
+        task = partial(timings.run_profiled, process_file, profile_dir, minify_html=minify_html, links_stamp=links_stamp)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(task, input_files))
+    # Workers counted their writes in their own processes
+    for meta in results:
         if meta:
-            posts_metadata.append(meta)
-    
+            output.tally(meta["output_written"])
+    return results
+
+def report_broken_links(link_index, shown=BROKEN_LINKS_SHOWN):
+    """Prints the first shown broken links with file and line. Returns how many there are."""
+    broken = list(link_index.broken())
+    for source, line, raw, reason in broken[:shown]:
+        print(f"[!] Broken link in {source}:{line}: {raw} ({reason})")
+    if len(broken) > shown:
+        print(f"[!] ...and {len(broken) - shown} more broken link(s). List them all with: python tools/manage.py check-links")
+    return len(broken)
+
+def build(input_files, force=False, jobs=1, compress=False, minify_outputs=True, report=None, assets=True):
+    """
+    Converts the given markdown files, skipping posts whose inputs are unchanged
+    since the last build, then regenerates the indexes from the post metadata
+    index. With compress, pre-compressed siblings are written for every text
+    artifact (see precompress). minify_outputs controls the minification of
+    the writeups, stylesheets and scripts (see minify). Stage and per-file
+    timings are collected into report (a timings.Report) when given.
+    assets=False skips the static asset pass, for callers that know no
+    stylesheet, script or template changed (see serve). Posts outside
+    input_files are converted too when the links or backlinks their page
+    shows changed.
+    """
+    report = report or timings.Report()
+    clock = report.clock
+    output.reset()
+
+    # Fingerprint assets first: it rewrites the template the posts depend on
+    if assets:
+        static_assets.fingerprint_assets(minify_outputs)
+        clock.lap("fingerprint_assets")
+
+    manifest = {} if force else load_manifest()
+    cached_posts = manifest.get("posts", {})
+    template_hash = template_fingerprint()
+    version = converter_version() + ("-min" if minify_outputs else "")
+
+    # Links resolve against every known post, not just this run's
+    conn = post_index.connect()
+    try:
+        post_index.refresh(conn, [f for f in input_files if os.path.exists(f)])
+        post_index.prune(conn)
+        link_index = post_index.link_index(conn)
+        body_hashes = post_index.body_hashes(conn)
+    finally:
+        conn.close()
+    set_link_index(link_index)
+    clock.lap("link_index")
+
+    # Pass 1: decide what needs converting
+    entries = {}
+    pending = []
+    for input_file in input_files:
+        if not os.path.exists(input_file):
+            print(f"[-] Error: File '{input_file}' not found.")
+            continue
+
+        key = os.path.normpath(input_file)
+        fingerprint = build_fingerprint(input_file, template_hash, version, link_index.digest(key))
+        entry = cached_posts.get(key)
+
+        # The stored body text must come from this source too (see post_index.stale_bodies)
+        body_current = body_hashes.get(post_index.output_name(input_file)) == fingerprint["source"]
+        if is_up_to_date(entry, fingerprint) and body_current:
+            entries[key] = entry
+        else:
+            entries[key] = None
+            pending.append(input_file)
+
+    # Posts outside this run whose page shows a changed part of the link graph
+    # (a post they link to, or one linking to them, was added, renamed or removed)
+    for key, entry in cached_posts.items():
+        if key in entries or key not in link_index.posts or not os.path.exists(key):
+            continue
+        if entry.get("fingerprint", {}).get("links") != link_index.digest(key):
+            entries[key] = None
+            pending.append(key)
+
+    skipped = len(entries) - len(pending)
+    clock.lap("plan")
+
+    # Pass 2: convert (possibly in parallel)
+    body_texts = {}
+    source_hashes = {}
+    anchors = {}
+    for input_file, meta in zip(pending, process_files(pending, jobs, minify_outputs, report.profile_dir, link_index.stamp)):
+        key = os.path.normpath(input_file)
+        if not meta:
+            del entries[key]
+            continue
+        body_texts[meta["filename"]] = meta.pop("body_text", "")
+        anchors[meta["filename"]] = meta.pop("anchors", [])
+        report.add_file(meta.pop("timings", None))
+        meta.pop("output_written", None)
+        # sanitize_content may have rewritten the source, so hash it again
+        fingerprint = build_fingerprint(input_file, template_hash, version, link_index.digest(key))
+        source_hashes[meta["filename"]] = fingerprint["source"]
+        entries[key] = {"fingerprint": fingerprint, "meta": dict(meta)}
+
+    # Keep entries for posts outside this run so partial builds don't forget them
+    merged = {k: v for k, v in cached_posts.items() if k not in entries and os.path.exists(k)}
+    merged.update(entries)
+    save_manifest({"posts": merged})
+    clock.lap("convert")
+
+    if skipped:
+        print(f"[*] Skipped {skipped} unchanged post(s).")
+
+    hilite_cache.prune()
+    clock.lap("hilite_prune")
+
+    # The indexes cover every published post known to the metadata index,
+    # not just the files passed to this run
+    conn = post_index.connect()
+    try:
+        post_index.refresh(conn, list(entries))
+        for filename, text in body_texts.items():
+            post_index.set_body_text(conn, filename, text, source_hashes[filename])
+        for filename, ids in anchors.items():
+            post_index.set_anchors(conn, filename, ids)
+            link_index.anchors[filename] = set(ids)
+        post_index.prune(conn)
+        posts_metadata = indexes.published_posts(conn)
+        bodies = post_index.body_texts(conn)
+    finally:
+        conn.close()
+    clock.lap("post_index")
+
+    report_broken_links(link_index)
+
     # Generate Indexes
-    generate_sitemap(posts_metadata)
-    generate_rss(posts_metadata)
-    generate_json_index(posts_metadata)
-    generate_noscript_fallback(posts_metadata)
+    indexes.generate_all(posts_metadata, bodies)
+    clock.lap("indexes")
+
+    precompress.refresh(compress=compress, jobs=jobs)
+    clock.lap("precompress")
+    output.report()
+    return posts_metadata
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert markdown writeups to HTML")
+    parser.add_argument("files", nargs="+", help="Markdown files to convert")
+    parser.add_argument("--force", action="store_true", help="Ignore the build manifest and rebuild every post")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes for conversion (0 = one per CPU)")
+    parser.add_argument("--compress", action="store_true", help="Write .gz/.br/.zst siblings for the generated text files")
+    parser.add_argument("--no-minify", action="store_true", help="Keep HTML/CSS/JS output unminified")
+    parser.add_argument("--timings", nargs="?", const=timings.DEFAULT_REPORT_PATH, metavar="PATH",
+                        help=f"Print per-stage/per-file timings and write them as JSON (default: {timings.DEFAULT_REPORT_PATH})")
+    parser.add_argument("--profile", metavar="PATH", help="Write a cProfile dump of the run to PATH (and folded stacks to PATH.folded)")
+    parser.add_argument("--no-daemon", action="store_true", help="Build in this process even if a build daemon is running")
+    args = parser.parse_args()
+
+    # A running build daemon has the converter warm; timings and profiles need this process
+    if not (args.no_daemon or args.timings or args.profile):
+        import build_daemon
+        try:
+            if build_daemon.build(args.files, force=args.force, jobs=args.jobs, compress=args.compress,
+                                  minify_outputs=not args.no_minify):
+                sys.exit(0)
+        except RuntimeError as e:
+            print(f"[-] Build failed in the daemon: {e}")
+            sys.exit(1)
+
+    report = timings.Report()
+    with timings.profiling(args.profile, report):
+        build(args.files, force=args.force, jobs=args.jobs, compress=args.compress,
+              minify_outputs=not args.no_minify, report=report)
+    if args.timings:
+        report.summary()
+        report.write(args.timings)
@@ -0,0 +1,201 @@
+"""
+Deploy manifest: every published file with its hash, size and cache policy.
+
+After a build, write_manifest() lists every file the site serves in
+DEPLOY_MANIFEST_PATH: the writeups, everything under assets/, data/ and
+favicon/, and the root artifacts (index.html, the sitemaps, feed, indexes and
+service worker, plus their pre-compressed siblings). Files are hashed through
+a stat cache in .build/, so a build only re-reads what it actually changed.
+
+Each file gets one of CACHE_POLICIES:
+  * immutable   its name carries a content hash (published images, image
+                variants, JSON pages), so its path never holds other bytes
+  * revalidate  pages, feeds, indexes and the service worker, which keep
+                their URL when their content changes, and the files pages
+                request with ?v=<hash> (everything in asset-manifest.json):
+                headers attach to the path, which is stable, so a client
+                that fetched the bare URL must not pin that version
+  * default     any other static file (favicons, unversioned images)
+
+The manifest is committed along with the other generated files, so diff()
+can compare the tree with any git revision: it returns the smallest
+upload/delete set that takes the old deploy to the new one (`manage.py
+diff-deploy`). orphans() is the build's cleanup: files under OWNED_DIRS that
+no current post produces.
+
+The manifest itself is not deployed: it describes the upload rather than
+being part of it, so published_files() never lists it.
+"""
+import os
+import re
+import json
+import hashlib
+import subprocess
+
+import output
+import precompress
+
+DEPLOY_MANIFEST_PATH = "deploy-manifest.json"
+STATE_PATH = os.path.join(".build", "deploy.json")
+ASSET_MANIFEST_PATH = "asset-manifest.json"
+SERVICE_WORKER_PATH = "sw.js"
+
+# Not DEPLOY_MANIFEST_PATH, which is committed for diff-deploy but never uploaded
+PUBLISHED_FILES = (
+    "index.html", "favicon.ico", "posts.json", "feed.xml", "robots.txt", "sw.js", "asset-manifest.json",
+)
+PUBLISHED_DIRS = ("writeups", "assets", "data", "favicon")
+SITEMAP_PATTERN = re.compile(r"sitemap[\w-]*\.xml")
+# Directories whose every file is generated from a post
+OWNED_DIRS = ("writeups",)
+
+CACHE_POLICIES = {
+    "immutable": "public, max-age=31536000, immutable",
+    "revalidate": "public, max-age=0, must-revalidate",
+    "default": "public, max-age=86400",
+}
+REVALIDATE_EXTENSIONS = (".html", ".xml", ".json", ".txt")
+# `<stem>.<hash>.<ext>`: image_store, image_variants and the JSON pages name files this way
+HASHED_NAME = re.compile(r"\.[0-9a-f]{10,}\.")
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _load_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def published_files():
+    """Repo-relative paths of every file the site serves, sorted."""
+    paths = []
+    for name in os.listdir("."):
+        if os.path.isfile(name) and (precompress.strip_sibling(name) in PUBLISHED_FILES
+                                     or SITEMAP_PATTERN.fullmatch(precompress.strip_sibling(name))):
+            paths.append(name)
+    for directory in PUBLISHED_DIRS:
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                if not name.startswith(".") and not name.endswith(".tmp"):
+                    paths.append(os.path.join(root, name).replace(os.sep, "/"))
+    return sorted(paths)
+
+
+def versioned_assets():
+    """Files pages only reference with ?v=<hash> (see static_assets)."""
+    manifest = _load_json(ASSET_MANIFEST_PATH)
+    if not isinstance(manifest, dict):
+        return set()
+    return set(manifest.get("assets", {}))
+
+
+def cache_policy(path, versioned):
+    """The CACHE_POLICIES name for path; a pre-compressed sibling gets its file's policy."""
+    path = precompress.strip_sibling(path)
+    if HASHED_NAME.search(os.path.basename(path)):
+        return "immutable"
+    if path in versioned or path == SERVICE_WORKER_PATH or path.endswith(REVALIDATE_EXTENSIONS):
+        return "revalidate"
+    return "default"
+
+
+def build_manifest():
+    """
+    Scans the published files into {"version", "policies", "files": {path:
+    {"hash", "size", "cache"}}}. Files whose mtime and size match the stat
+    cache are not re-hashed.
+    """
+    state = _load_json(STATE_PATH)
+    state = state if isinstance(state, dict) else {}
+    versioned = versioned_assets()
+    files = {}
+    new_state = {}
+    for path in published_files():
+        st = os.stat(path)
+        cached = state.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            digest = cached[2]
+        else:
+            digest = _file_hash(path)
+        new_state[path] = [st.st_mtime_ns, st.st_size, digest]
+        files[path] = {"hash": digest, "size": st.st_size, "cache": cache_policy(path, versioned)}
+
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    output.write(STATE_PATH, json.dumps(new_state, separators=(",", ":"), sort_keys=True))
+    return {"version": 1, "policies": CACHE_POLICIES, "files": files}
+
+
+def load_manifest(path=DEPLOY_MANIFEST_PATH):
+    """Loads a deploy manifest, or None if missing or unreadable."""
+    manifest = _load_json(path)
+    if isinstance(manifest, dict) and isinstance(manifest.get("files"), dict):
+        return manifest
+    return None
+
+
+def load_revision(rev, path=DEPLOY_MANIFEST_PATH):
+    """The deploy manifest as committed at a git revision, or None if it wasn't committed there."""
+    result = subprocess.run(["git", "show", f"{rev}:{path}"], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    try:
+        manifest = json.loads(result.stdout)
+    except ValueError:
+        return None
+    return manifest if isinstance(manifest, dict) and isinstance(manifest.get("files"), dict) else None
+
+
+def write_manifest(manifest, path=DEPLOY_MANIFEST_PATH):
+    output.write(path, json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
+
+def diff(old, new):
+    """
+    What it takes to go from the old deploy to the new one:
+    {"upload": [(path, reason)], "delete": [path], "unchanged": n, "bytes": n}.
+    reason is "new", "changed" (content) or "policy" (only the cache policy
+    changed, so the headers need refreshing). old may be None (nothing
+    deployed yet).
+    """
+    old_files = old["files"] if old else {}
+    new_files = new["files"]
+    upload = []
+    unchanged = 0
+    for path, entry in sorted(new_files.items()):
+        previous = old_files.get(path)
+        if previous is None:
+            upload.append((path, "new"))
+        elif previous.get("hash") != entry["hash"]:
+            upload.append((path, "changed"))
+        elif previous.get("cache") != entry["cache"]:
+            upload.append((path, "policy"))
+        else:
+            unchanged += 1
+    return {
+        "upload": upload,
+        "delete": sorted(path for path in old_files if path not in new_files),
+        "unchanged": unchanged,
+        "bytes": sum(new_files[path]["size"] for path, _ in upload),
+    }
+
+
+def orphans(manifest, owned):
+    """
+    Files in the manifest under OWNED_DIRS that the build no longer produces.
+    owned holds the expected outputs; pre-compressed siblings belong to the
+    file they were made from.
+    """
+    return [
+        path for path in manifest["files"]
+        if path.startswith(tuple(d + "/" for d in OWNED_DIRS)) and precompress.strip_sibling(path) not in owned
+    ]
@@ -0,0 +1,128 @@
+"""
+On-disk cache for code blocks highlighted by the codehilite extension.
+
+Pygments is the slowest part of converting a writeup, and the same snippets
+(nmap runs, bash one-liners) show up in many posts and in every rebuild.
+install() swaps codehilite's CodeHilite class for a subclass that looks the
+highlighted HTML up in CACHE_DIR before calling Pygments. Entries are keyed by
+the code text, language, lexer/formatter options and the Pygments/Markdown
+versions. Every hit refreshes the entry's mtime, so prune() can evict in
+least-recently-used order once the cache grows past MAX_CACHE_BYTES.
+"""
+import os
+import json
+import hashlib
+
+import markdown
+from markdown.extensions import codehilite, fenced_code
+
+try:
+    import pygments
+    PYGMENTS_VERSION = pygments.__version__
+except ImportError:
+    PYGMENTS_VERSION = None
+
+CACHE_DIR = os.path.join(".build", "hilite")
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def cache_key(hiliter, shebang):
+    """Hashes everything that can change the HTML produced by CodeHilite.hilite()."""
+    formatter = hiliter.pygments_formatter
+    if not isinstance(formatter, str):
+        formatter = f"{formatter.__module__}.{formatter.__qualname__}"
+
+    payload = json.dumps({
+        "src": hiliter.src,
+        "lang": hiliter.lang,
+        "guess_lang": hiliter.guess_lang,
+        "use_pygments": hiliter.use_pygments,
+        "lang_prefix": hiliter.lang_prefix,
+        "formatter": formatter,
+        "options": {k: repr(v) for k, v in hiliter.options.items()},
+        "shebang": shebang,
+        "pygments": PYGMENTS_VERSION,
+        "markdown": markdown.__version__,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, key[:2], key + ".html")
+
+
+def get(key):
+    path = _entry_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+    except OSError:
+        return None
+    try:
+        os.utime(path)  # Mark as recently used
+    except OSError:
+        pass
+    return html
+
+
+def put(key, html):
+    path = _entry_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Unique temp name so parallel build workers never clobber each other
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[!] Warning: Could not write highlight cache entry: {e}")
+
+
+class CachedCodeHilite(codehilite.CodeHilite):
+    def hilite(self, shebang=True):
+        key = cache_key(self, shebang)
+        html = get(key)
+        if html is None:
+            html = super().hilite(shebang)
+            put(key, html)
+        return html
+
+
+def install():
+    """Routes codehilite and fenced_code highlighting through the cache."""
+    codehilite.CodeHilite = CachedCodeHilite
+    fenced_code.CodeHilite = CachedCodeHilite
+
+
+def prune(max_bytes=MAX_CACHE_BYTES):
+    """Deletes least recently used entries until the cache fits in max_bytes."""
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+
+    entries = []
+    total = 0
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+    removed = 0
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            pass
+
+    if removed:
+        print(f"[*] Pruned {removed} highlighted code block(s) from cache.")
+    return removed
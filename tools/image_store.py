@@ -0,0 +1,173 @@
+"""
+Content-addressed storage for images referenced by writeups.
+
+Images are published to assets/img/ as `<name>.<hash><ext>`, where hash is
+taken from the file's bytes. Identical files are stored once (whatever they
+are called), two different `screenshot.png` files can no longer overwrite
+each other, and every published URL is immutable and safe to cache forever.
+
+A manifest in .build/images.db maps each source path to its hash and
+published path. Sources whose mtime and size are unchanged are not even
+re-hashed, and nothing is copied when the published file already exists, so
+rebuilds do almost no image I/O.
+
+When a source image changes, it is published under a new name and the old
+file is superseded. prune() runs after every full build and deletes published
+files that no post references any more, along with the manifest rows of
+sources no post uses.
+"""
+import os
+import re
+import shutil
+import sqlite3
+import hashlib
+
+ASSETS_IMG_DIR = "assets/img"
+DB_PATH = os.path.join(".build", "images.db")
+HASH_LENGTH = 12
+IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\(([^)]+)\)')
+# `<stem>.<hash><ext>`, as publish() names files
+PUBLISHED_NAME = re.compile(r".+\.([0-9a-f]{%d})\.[^.]+" % HASH_LENGTH)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    source      TEXT PRIMARY KEY,
+    mtime_ns    INTEGER NOT NULL,
+    size        INTEGER NOT NULL,
+    hash        TEXT NOT NULL,
+    public_path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_hash ON images (hash);
+"""
+
+_conn = None
+_conn_pid = None
+
+
+def connect():
+    """Returns this process's connection to the image manifest."""
+    global _conn, _conn_pid
+    # SQLite connections must not cross a fork, so build workers open their own
+    if _conn is None or _conn_pid != os.getpid():
+        _conn_pid = os.getpid()
+        directory = os.path.dirname(DB_PATH)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        _conn = sqlite3.connect(DB_PATH, timeout=30)
+        _conn.row_factory = sqlite3.Row
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def _hash_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()[:HASH_LENGTH]
+
+
+def publish(source_path):
+    """
+    Publishes an image and returns its path relative to the repo root
+    (e.g. "assets/img/screenshot.3f2a9c0d1e4b.png").
+    """
+    conn = connect()
+    source = os.path.abspath(source_path)
+    st = os.stat(source)
+
+    row = conn.execute("SELECT * FROM images WHERE source = ?", (source,)).fetchone()
+    if row and row["mtime_ns"] == st.st_mtime_ns and row["size"] == st.st_size and os.path.exists(row["public_path"]):
+        return row["public_path"]
+
+    digest = _hash_file(source)
+
+    # Same bytes already published (possibly under another name)? Reuse them.
+    public_path = None
+    for other in conn.execute("SELECT public_path FROM images WHERE hash = ?", (digest,)):
+        if os.path.exists(other["public_path"]):
+            public_path = other["public_path"]
+            break
+
+    if public_path is None:
+        stem, ext = os.path.splitext(os.path.basename(source))
+        public_path = os.path.join(ASSETS_IMG_DIR, f"{stem}.{digest}{ext.lower()}").replace(os.sep, "/")
+        if not os.path.exists(public_path):
+            os.makedirs(ASSETS_IMG_DIR, exist_ok=True)
+            tmp_path = f"{public_path}.{os.getpid()}.tmp"
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, public_path)
+            print(f"[+] Published image: {os.path.basename(source)} -> {public_path}")
+
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO images (source, mtime_ns, size, hash, public_path) VALUES (?, ?, ?, ?, ?)",
+            (source, st.st_mtime_ns, st.st_size, digest, public_path),
+        )
+    return public_path
+
+
+def find_local_images(md_content, source_file_path):
+    """
+    Returns the local image files referenced by a markdown source, resolved the
+    same way convert.process_images resolves them.
+    """
+    source_dir = os.path.dirname(os.path.abspath(source_file_path))
+    images = []
+    for match in IMAGE_PATTERN.finditer(md_content):
+        original_path = match.group(1)
+        if original_path.startswith('http://') or original_path.startswith('https://'):
+            continue
+        if os.path.isabs(original_path):
+            images.append(original_path)
+        else:
+            images.append(os.path.relpath(os.path.join(source_dir, original_path)))
+    return images
+
+
+def _published_by_us(path):
+    """True for a file in ASSETS_IMG_DIR named the way publish() names it, after its own bytes."""
+    match = PUBLISHED_NAME.fullmatch(os.path.basename(path))
+    return bool(match) and _hash_file(path) == match.group(1)
+
+
+def referenced(md_files):
+    """
+    What md_files (every post) use: (absolute source paths, published paths).
+    Published paths include images a post links to under assets/img/ directly.
+    """
+    sources = set()
+    paths = set()
+    for md_file in md_files:
+        with open(md_file, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        for image_path in find_local_images(text, md_file):
+            sources.add(os.path.abspath(image_path))
+            paths.add(os.path.relpath(image_path).replace(os.sep, "/"))
+    for row in connect().execute("SELECT source, public_path FROM images"):
+        if row["source"] in sources:
+            paths.add(row["public_path"])
+    return sources, paths
+
+
+def prune(sources, paths):
+    """
+    Deletes published images not in paths and forgets sources not in sources
+    (see referenced()). Only files publish() made are deleted. Returns the
+    removed paths.
+    """
+    conn = connect()
+    with conn:
+        stale = [row["source"] for row in conn.execute("SELECT source FROM images") if row["source"] not in sources]
+        conn.executemany("DELETE FROM images WHERE source = ?", [(source,) for source in stale])
+
+    if not os.path.isdir(ASSETS_IMG_DIR):
+        return []
+    removed = []
+    for name in sorted(os.listdir(ASSETS_IMG_DIR)):
+        path = f"{ASSETS_IMG_DIR}/{name}"
+        if path in paths or not os.path.isfile(path) or not _published_by_us(path):
+            continue
+        os.remove(path)
+        removed.append(path)
+    return removed
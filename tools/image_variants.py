@@ -0,0 +1,227 @@
+"""
+Responsive derivatives of published writeup images.
+
+For every raster image under assets/img/ this stage writes resized copies in
+modern formats (AVIF when the installed Pillow can encode it, WebP otherwise
+or as well) at the widths in WIDTHS, plus a 1200x630 crop used for og:image.
+The original stays the <img> fallback.
+
+Results are cached in CACHE_DIR under a key made of the source's content hash
+and every transform parameter, so an image is only decoded when it or the
+settings changed. Derivatives are named after that key, which makes them
+immutable, and are written via temp file + rename so parallel build workers
+can generate them safely. prune() deletes the derivatives and cache entries
+of images no post uses any more, and those made with old settings.
+
+Pillow is optional: without it variants() returns None and pages keep the
+plain <img> tags.
+"""
+import os
+import re
+import json
+import hashlib
+
+try:
+    from PIL import Image, ImageOps, features
+    PILLOW_VERSION = Image.__version__
+except ImportError:
+    Image = None
+    PILLOW_VERSION = None
+
+ASSETS_IMG_DIR = "assets/img"
+DERIVED_DIR = os.path.join(ASSETS_IMG_DIR, "derived")
+CACHE_DIR = os.path.join(".build", "variants")
+
+WIDTHS = (480, 960, 1600)
+QUALITY = {"avif": 55, "webp": 80}
+OG_SIZE = (1200, 630)
+OG_QUALITY = 85
+SIZES = "(max-width: 1100px) calc(100vw - 40px), 1060px"
+RASTER_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff", ".webp")
+
+# `<stem>.<key[:10]>.<width>w.<format>` and `<stem>.<key[:10]>.og.jpg`, as _render() names them
+DERIVED_NAME = re.compile(r".+\.([0-9a-f]{10})\.(?:\d+w\.[a-z]+|og\.jpg)")
+
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+_memo = {}
+_warned = False
+
+
+def available():
+    if Image is None:
+        global _warned
+        if not _warned:
+            print("[!] Warning: Pillow is not installed, skipping responsive image variants.")
+            _warned = True
+        return False
+    return True
+
+
+def formats():
+    """The derivative formats this Pillow build can encode, best first."""
+    if Image is None:
+        return ()
+    # Older Pillow releases don't know the avif module at all
+    return tuple(
+        fmt for fmt in ("avif", "webp")
+        if fmt in features.modules and features.check_module(fmt)
+    )
+
+
+def settings_key():
+    """Everything besides the source bytes that changes the derivatives."""
+    return json.dumps({
+        "widths": WIDTHS,
+        "quality": QUALITY,
+        "og": [OG_SIZE, OG_QUALITY],
+        "formats": formats(),
+        "pillow": PILLOW_VERSION,
+    }, sort_keys=True)
+
+
+def _hash_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _key(public_path):
+    """Names a published image's derivatives: its content hash and the settings."""
+    return hashlib.sha256(f"{_hash_file(public_path)}\n{settings_key()}".encode("utf-8")).hexdigest()
+
+
+def _save(image, path, fmt, **options):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    image.save(tmp_path, fmt, **options)
+    os.replace(tmp_path, path)
+
+
+def _render(source_path, key, stem):
+    """Decodes the source once and writes every derivative. Returns the cache entry."""
+    with Image.open(source_path) as im:
+        if getattr(im, "n_frames", 1) > 1:
+            # Animated images would lose their frames
+            return {"width": im.width, "height": im.height, "variants": [], "og": None}
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info or im.mode in ("LA", "PA") else "RGB")
+        width, height = im.size
+
+        # Never upscale; the largest variant is the source width itself
+        widths = [w for w in WIDTHS if w < width]
+        if width <= WIDTHS[-1]:
+            widths.append(width)
+
+        variants = []
+        for w in widths:
+            h = max(1, round(height * w / width))
+            resized = im if w == width else im.resize((w, h), Image.LANCZOS)
+            for fmt in formats():
+                path = os.path.join(DERIVED_DIR, f"{stem}.{key[:10]}.{w}w.{fmt}").replace(os.sep, "/")
+                if not os.path.exists(path):
+                    _save(resized, path, fmt.upper(), quality=QUALITY[fmt])
+                variants.append({"path": path, "width": w, "height": h, "format": fmt})
+
+        og_path = os.path.join(DERIVED_DIR, f"{stem}.{key[:10]}.og.jpg").replace(os.sep, "/")
+        if not os.path.exists(og_path):
+            og = ImageOps.fit(im, OG_SIZE, Image.LANCZOS)
+            if og.mode == "RGBA":
+                flat = Image.new("RGB", og.size, (0, 0, 0))
+                flat.paste(og, mask=og.getchannel("A"))
+                og = flat
+            _save(og, og_path, "JPEG", quality=OG_QUALITY, optimize=True)
+
+    return {"width": width, "height": height, "variants": variants, "og": og_path}
+
+
+def variants(public_path):
+    """
+    Makes sure the derivatives of a published image (repo-relative path such as
+    "assets/img/shot.3f2a9c0d1e4b.png") exist and returns
+    {"width", "height", "variants": [{"path", "width", "height", "format"}], "og"},
+    or None when Pillow is missing or the file isn't a raster image.
+    """
+    if not public_path.lower().endswith(RASTER_EXTENSIONS) or not os.path.exists(public_path):
+        return None
+    st = os.stat(public_path)
+    memo_key = (public_path, st.st_mtime_ns, st.st_size)
+    if memo_key in _memo:
+        return _memo[memo_key]
+    if not available():
+        return None
+
+    key = _key(public_path)
+    cache_path = os.path.join(CACHE_DIR, key[:2], key + ".json")
+
+    entry = None
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        paths = [v["path"] for v in entry["variants"]] + ([entry["og"]] if entry["og"] else [])
+        if not all(os.path.exists(p) for p in paths):
+            entry = None
+    except (OSError, ValueError, KeyError):
+        entry = None
+
+    if entry is None:
+        stem = os.path.splitext(os.path.basename(public_path))[0]
+        try:
+            entry = _render(public_path, key, stem)
+        except Exception as e:
+            print(f"[!] Error generating variants for {public_path}: {e}")
+            _memo[memo_key] = None
+            return None
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, cache_path)
+        print(f"[+] Generated {len(entry['variants'])} variant(s) for {public_path}")
+
+    _memo[memo_key] = entry
+    return entry
+
+
+def prune(public_paths):
+    """
+    Deletes derivatives and cache entries whose key isn't that of a current
+    image in public_paths (the published images posts use), i.e. those of
+    removed or changed images and of old settings. Does nothing without
+    Pillow, which can't make new ones. Returns the removed paths.
+    """
+    if Image is None:
+        return []
+    keys = {
+        _key(path) for path in public_paths
+        if path.lower().endswith(RASTER_EXTENSIONS) and os.path.isfile(path)
+    }
+    short_keys = {key[:10] for key in keys}
+
+    removed = []
+    if os.path.isdir(DERIVED_DIR):
+        for name in sorted(os.listdir(DERIVED_DIR)):
+            match = DERIVED_NAME.fullmatch(name)
+            if match and match.group(1) not in short_keys:
+                path = os.path.join(DERIVED_DIR, name).replace(os.sep, "/")
+                os.remove(path)
+                removed.append(path)
+    if os.path.isdir(CACHE_DIR):
+        for root, _, files in os.walk(CACHE_DIR):
+            for name in files:
+                if name.endswith(".json") and name[:-len(".json")] not in keys:
+                    os.remove(os.path.join(root, name))
+    return removed
+
+
+def srcsets(entry, prefix="../"):
+    """Returns [(mime type, srcset)] for an entry, best format first."""
+    result = []
+    for fmt in formats():
+        items = [f"{prefix}{v['path']} {v['width']}w" for v in entry["variants"] if v["format"] == fmt]
+        if items:
+            result.append((MIME_TYPES[fmt], ", ".join(items)))
+    return result
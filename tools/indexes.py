@@ -0,0 +1,475 @@
+"""
+Site index generators: sitemap.xml, feed.xml, posts.json and the <noscript>
+fallback in index.html.
+
+They only need post metadata, so this module (like post_index) avoids the
+markdown stack. convert.py calls them after converting posts; `manage.py
+reindex` calls them straight from the metadata index without touching
+writeups/.
+"""
+import os
+import re
+import json
+import datetime
+import hashlib
+import heapq
+import email.utils
+from xml.sax.saxutils import escape
+
+import output
+import post_index
+
+BASE_URL = "https://alterpix.github.io"
+OUTPUT_DIR = "writeups"
+
+SITEMAP_PATH = "sitemap.xml"
+SITEMAP_INDEX_PATH = "sitemap_index.xml"
+SITEMAP_SHARD_PATTERN = "sitemap-{}.xml"
+ROBOTS_PATH = "robots.txt"
+# Protocol limits are 50,000 URLs and 50 MB (uncompressed) per sitemap file
+SITEMAP_MAX_URLS = 50000
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+FEED_PATH = "feed.xml"
+RSS_MAX_ITEMS = 50
+
+SITEMAP_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+SITEMAP_FOOTER = '</urlset>'
+
+class SitemapWriter:
+    """
+    Streams <url> entries to disk, starting a new shard whenever the current
+    one would exceed the URL count or byte limits. Shards go through
+    output.OutputFile and replace their file only when changed; a lone shard
+    is committed straight to single_path.
+    """
+    def __init__(self, max_urls=SITEMAP_MAX_URLS, max_bytes=SITEMAP_MAX_BYTES, single_path=SITEMAP_PATH):
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.single_path = single_path
+        self.shards = []
+        self.total = 0
+        self._file = None
+        self._urls = 0
+        self._bytes = 0
+
+    def _open_shard(self):
+        self._close_shard()
+        path = SITEMAP_SHARD_PATTERN.format(len(self.shards) + 1)
+        self.shards.append(path)
+        self._file = output.OutputFile(path)
+        self._file.write(SITEMAP_HEADER)
+        self._urls = 0
+        self._bytes = len(SITEMAP_HEADER.encode("utf-8")) + len(SITEMAP_FOOTER)
+
+    def _close_shard(self, path=None):
+        if self._file:
+            self._file.write(SITEMAP_FOOTER)
+            self._file.commit(path)
+            self._file = None
+
+    def add(self, loc, changefreq, priority, lastmod=None):
+        entry = f'  <url>\n    <loc>{escape(loc)}</loc>\n'
+        if lastmod:
+            entry += f'    <lastmod>{lastmod}</lastmod>\n'
+        entry += f'    <changefreq>{changefreq}</changefreq>\n    <priority>{priority}</priority>\n  </url>\n'
+
+        size = len(entry.encode("utf-8"))
+        if self._file is None or self._urls >= self.max_urls or self._bytes + size > self.max_bytes:
+            self._open_shard()
+        self._file.write(entry)
+        self._urls += 1
+        self._bytes += size
+        self.total += 1
+
+    def close(self):
+        """Finishes the last shard and returns the list of shard paths."""
+        self._close_shard(self.single_path if len(self.shards) == 1 else None)
+        return self.shards
+
+def _set_robots_sitemap(sitemap_url):
+    """Points the Sitemap: line of robots.txt at the current sitemap entry file."""
+    if not os.path.exists(ROBOTS_PATH):
+        return
+    with open(ROBOTS_PATH, "r", encoding="utf-8") as f:
+        content = f.read()
+    new_content = re.sub(r'(?m)^Sitemap:.*$', f"Sitemap: {sitemap_url}", content)
+    if new_content != content:
+        output.write(ROBOTS_PATH, new_content)
+        print(f"[+] Updated {ROBOTS_PATH} sitemap entry.")
+
+def _remove_stale(paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+def generate_sitemap(posts):
+    """
+    Generates sitemap.xml, streaming entries to disk. Archives too large for a
+    single file are split into sitemap-N.xml shards listed by sitemap_index.xml.
+    Posts without a date get no <lastmod> (it is optional) rather than the
+    build date, which would change the file on every build.
+    """
+    old_shards = [f for f in os.listdir(".") if re.fullmatch(SITEMAP_SHARD_PATTERN.format(r"\d+"), f)]
+
+    writer = SitemapWriter()
+    # Add root
+    writer.add(f"{BASE_URL}/", "daily", "1.0")
+    for post in posts:
+        writer.add(post["url"], "monthly", "0.8", post.get("date"))
+    shards = writer.close()
+
+    if len(shards) == 1:
+        # The lone shard was committed as sitemap.xml
+        _remove_stale([SITEMAP_INDEX_PATH] + old_shards)
+        _set_robots_sitemap(f"{BASE_URL}/{SITEMAP_PATH}")
+        print(f"[+] Generated {SITEMAP_PATH} with {len(posts)} posts.")
+        return
+
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>\n',
+             '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+    for shard in shards:
+        lines.append(f'  <sitemap>\n    <loc>{BASE_URL}/{shard}</loc>\n  </sitemap>\n')
+    lines.append('</sitemapindex>')
+    output.write(SITEMAP_INDEX_PATH, "".join(lines))
+
+    _remove_stale([SITEMAP_PATH] + [s for s in old_shards if s not in shards])
+    _set_robots_sitemap(f"{BASE_URL}/{SITEMAP_INDEX_PATH}")
+    print(f"[+] Generated {SITEMAP_INDEX_PATH} with {len(shards)} sitemaps ({len(posts)} posts).")
+
+def rfc822_date(date_str):
+    """Formats a YYYY-MM-DD post date as an RFC-822 date for RSS, or None."""
+    try:
+        day = datetime.datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+    except (TypeError, ValueError):
+        return None
+    return email.utils.format_datetime(day)
+
+def generate_rss(posts, max_items=RSS_MAX_ITEMS):
+    """Generates feed.xml with the newest max_items posts, written as a stream."""
+    newest = heapq.nlargest(max_items, posts, key=lambda x: x.get('date') or '0000-00-00')
+
+    with output.OutputFile(FEED_PATH) as f:
+        f.write('<?xml version="1.0" encoding="UTF-8" ?>\n')
+        f.write('<rss version="2.0">\n')
+        f.write('<channel>\n')
+        f.write('  <title>Alterpix Writeups</title>\n')
+        f.write(f'  <link>{BASE_URL}</link>\n')
+        f.write('  <description>Cyber Security Writeups &amp; Tutorials</description>\n')
+
+        last_build = rfc822_date(newest[0].get("date")) if newest else None
+        if last_build:
+            f.write(f'  <lastBuildDate>{last_build}</lastBuildDate>\n')
+
+        for post in newest:
+            f.write('  <item>\n')
+            f.write(f'    <title>{escape(post["title"])}</title>\n')
+            f.write(f'    <link>{escape(post["url"])}</link>\n')
+            f.write(f'    <guid isPermaLink="true">{escape(post["url"])}</guid>\n')
+            f.write(f'    <description>{escape(post.get("description", ""))}</description>\n')
+            pub_date = rfc822_date(post.get("date"))
+            if pub_date:
+                f.write(f'    <pubDate>{pub_date}</pubDate>\n')
+            f.write('  </item>\n')
+
+        f.write('</channel>\n</rss>')
+
+    print(f"[+] Generated {FEED_PATH} with {len(newest)} of {len(posts)} posts.")
+
+JSON_INDEX_PATH = "posts.json"
+JSON_PAGES_DIR = os.path.join("data", "posts")
+JSON_PAGE_SIZE = 20
+# Fields the index page needs; everything else stays out of the shards
+JSON_FIELDS = ("id", "title", "date", "category", "url")
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or "uncategorized"
+
+def _write_hashed_json(directory, stem, obj, written):
+    data = json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+    digest = hashlib.sha256(data.encode("utf-8")).hexdigest()[:10]
+    path = os.path.join(directory, f"{stem}.{digest}.json")
+    # Named by content hash: an existing file already holds these bytes
+    if os.path.exists(path):
+        output.tally(False)
+    else:
+        output.write(path, data)
+    written.add(os.path.normpath(path))
+    return path.replace(os.sep, "/")
+
+def _write_json_pages(posts, prefix, written):
+    """
+    Writes posts as a chain of fixed-size pages, each pointing at the next, and
+    returns the path of the first one (None when there are no posts). Pages
+    are named by content hash, so unchanged pages keep their URL and can be
+    cached forever, and the manifest only needs the head of each chain.
+    """
+    next_path = None
+    starts = range(0, len(posts), JSON_PAGE_SIZE)
+    # Written back to front: each page's name depends on the page after it
+    for number, start in reversed(list(enumerate(starts, 1))):
+        chunk = [{k: post[k] for k in JSON_FIELDS if k in post} for post in posts[start:start + JSON_PAGE_SIZE]]
+        next_path = _write_hashed_json(JSON_PAGES_DIR, f"{prefix}-{number}", {"posts": chunk, "next": next_path}, written)
+    return next_path
+
+def generate_json_index(posts):
+    """
+    Generates posts.json for client-side rendering: a small manifest pointing
+    at newest-first pages of JSON_PAGE_SIZE posts, plus per-category pages.
+    The manifest's size depends on the number of categories, not posts, and
+    the front page loads it and the first page only.
+    """
+    
+    # Sort posts by date (newest first)
+    posts.sort(key=lambda x: x.get('date') or '0000-00-00', reverse=True)
+    
+    # Add ID hash if not present
+    for post in posts:
+        if 'id' not in post:
+            post['id'] = hashlib.md5(post['title'].encode()).hexdigest()[:4].upper()
+            
+        # Ensure relative URL
+        if post['url'].startswith(BASE_URL):
+            post['url'] = post['url'].replace(BASE_URL + "/", "")
+
+    if not os.path.exists(JSON_PAGES_DIR):
+        os.makedirs(JSON_PAGES_DIR)
+
+    written = set()
+    categories = {}
+    for post in posts:
+        label = post.get("category") or "Uncategorized"
+        categories.setdefault(label.upper(), {"label": label, "posts": []})["posts"].append(post)
+
+    manifest = {
+        "version": 2,
+        "total": len(posts),
+        "page_size": JSON_PAGE_SIZE,
+        "first": _write_json_pages(posts, "page", written),
+        "categories": {
+            key: {
+                "label": cat["label"],
+                "count": len(cat["posts"]),
+                "first": _write_json_pages(cat["posts"], f"cat-{_slug(key)}", written),
+            }
+            for key, cat in sorted(categories.items())
+        },
+    }
+
+    # Drop pages from previous builds that nothing references any more
+    for name in os.listdir(JSON_PAGES_DIR):
+        path = os.path.normpath(os.path.join(JSON_PAGES_DIR, name))
+        if name.endswith(".json") and path not in written:
+            os.remove(path)
+
+    output.write(JSON_INDEX_PATH, json.dumps(manifest, separators=(",", ":"), ensure_ascii=False))
+
+    pages = -(-len(posts) // JSON_PAGE_SIZE)
+    print(f"[+] Generated {JSON_INDEX_PATH} with {len(posts)} posts in {pages} page(s).")
+
+SEARCH_DIR = os.path.join("data", "search")
+SEARCH_INDEX_PATH = os.path.join(SEARCH_DIR, "index.json")
+SEARCH_DOCS_PER_SHARD = 500
+SEARCH_MIN_WORD_LEN = 2
+# Term shards are keyed by a one-character prefix until the vocabulary gets
+# big enough for two-character prefixes to pay off
+SEARCH_LONG_PREFIX_TERMS = 20000
+# Weight of a term occurrence per field
+SEARCH_FIELD_WEIGHTS = (("title", 5), ("tags", 4), ("description", 2), ("body", 1))
+
+# Splits camelCase/PascalCase identifiers too: "SMBConnection" -> "SMB", "Connection"
+SEARCH_WORD_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+# Indonesian enclitics ("exploitnya" -> "exploit"), only stripped from longer words
+SEARCH_SUFFIXES = ("nya", "lah", "kah")
+SEARCH_STOPWORDS = frozenset("""
+    ada adalah agar akan aku atau bahwa bisa dalam dan dari dengan di ini itu
+    jadi juga kalau kami kamu karena ke kita lebih oleh pada saat saja sangat
+    sebagai sudah tapi tidak untuk yang
+    an and are as at be by for from has have in is it of on or that the this
+    to was we were will with you your
+""".split())
+
+def search_terms(text):
+    """
+    Tokenizes text for the search index. The index page applies the same rules
+    (shipped in the index manifest) to queries.
+    """
+    for word in SEARCH_WORD_PATTERN.findall(text):
+        word = word.lower()
+        if len(word) > 5 and word.endswith(SEARCH_SUFFIXES):
+            word = word[:-3]
+        if len(word) >= SEARCH_MIN_WORD_LEN and word not in SEARCH_STOPWORDS:
+            yield word
+
+def generate_search_index(posts, bodies):
+    """
+    Builds the full-text search index for the index page: an inverted index
+    over title, tags, description and rendered body, split into shards by
+    term prefix, plus shards of document info. The page loads index.json on the first search and then only the
+    shards the query needs.
+    """
+    if not os.path.exists(SEARCH_DIR):
+        os.makedirs(SEARCH_DIR)
+
+    postings = {}
+    docs = []
+    for doc, post in enumerate(posts):
+        fields = {
+            "title": post.get("title", ""),
+            "tags": post.get("tags", ""),
+            "description": post.get("description", ""),
+            "body": bodies.get(post["filename"], ""),
+        }
+        scores = {}
+        for field, weight in SEARCH_FIELD_WEIGHTS:
+            for term in search_terms(fields[field]):
+                scores[term] = scores.get(term, 0) + weight
+        for term, score in scores.items():
+            postings.setdefault(term, []).append([doc, score])
+
+        docs.append({
+            "id": post.get("id"),
+            "title": post.get("title"),
+            "date": post.get("date"),
+            "category": post.get("category"),
+            "url": post["url"].replace(BASE_URL + "/", ""),
+        })
+
+    prefix_len = 2 if len(postings) >= SEARCH_LONG_PREFIX_TERMS else 1
+    shards = {}
+    for term in sorted(postings):
+        # Best matches first
+        postings[term].sort(key=lambda p: (-p[1], p[0]))
+        shards.setdefault(term[:prefix_len], {})[term] = postings[term]
+
+    written = set()
+    manifest = {
+        "version": 1,
+        "prefix_len": prefix_len,
+        "min_len": SEARCH_MIN_WORD_LEN,
+        "word_pattern": SEARCH_WORD_PATTERN.pattern,
+        "suffixes": list(SEARCH_SUFFIXES),
+        "stopwords": sorted(SEARCH_STOPWORDS),
+        "docs_per_shard": SEARCH_DOCS_PER_SHARD,
+        "docs": [
+            _write_hashed_json(SEARCH_DIR, f"docs-{n}", docs[start:start + SEARCH_DOCS_PER_SHARD], written)
+            for n, start in enumerate(range(0, len(docs), SEARCH_DOCS_PER_SHARD), 1)
+        ],
+        "shards": {
+            prefix: _write_hashed_json(SEARCH_DIR, f"terms-{prefix}", terms, written)
+            for prefix, terms in shards.items()
+        },
+    }
+
+    for name in os.listdir(SEARCH_DIR):
+        path = os.path.normpath(os.path.join(SEARCH_DIR, name))
+        if name.endswith(".json") and path not in written and path != os.path.normpath(SEARCH_INDEX_PATH):
+            os.remove(path)
+
+    output.write(SEARCH_INDEX_PATH, json.dumps(manifest, separators=(",", ":"), ensure_ascii=False))
+
+    print(f"[+] Generated search index: {len(postings)} terms in {len(shards)} shard(s) for {len(docs)} posts.")
+
+def generate_noscript_fallback(posts):
+    """Generates static HTML links inside <noscript> for SEO."""
+    
+    html_output = "<h3>:: STATIC_DB_ACCESS ::</h3><ul>"
+    
+    # Sort by date
+    posts.sort(key=lambda x: x.get('date') or '0000-00-00', reverse=True)
+    
+    for post in posts:
+        url = post['url'].replace(BASE_URL + "/", "")
+        title = post['title']
+        date = post.get('date') or '----'
+        html_output += f'<li><a href="{url}">[{date}] {title}</a></li>\n'
+    
+    html_output += "</ul>"
+    
+    index_path = "index.html"
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            content = f.read()
+            
+        marker = "<!-- STATIC_LINKS_PLACEHOLDER -->"
+        if marker in content:
+            new_content = content.replace(marker, html_output)
+            # Or regex replace if we already ran it, but for now simple replacement is fine 
+            # as long as we don't need to update it continuously without a wrapper.
+            # actually, let's use a wrapper strategy like before to be safe for re-runs.
+            
+            # Better strategy: Regex replace the CONTENT of <noscript>...<div class="static-list">...</div>
+            # But the user asked for simple addition. 
+            # To allow updates, let's replace the placeholder with "<!-- STATIC_START --> content <!-- STATIC_END -->"
+            # and verify logical branching.
+            
+            # However, I removed the previous simpler approach. Let's just use the placeholder replacement
+            # but wrapping it so we can find it again?
+            # Actually, `convert.py` is often run multiple times. 
+            # If I replace the placeholder, it's gone.
+            # I need `<!-- STATIC_LINKS_PLACEHOLDER -->` to PERSIST or act as a boundary.
+            
+            pass 
+            
+    # Re-impl with robust replacement
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            content = f.read()
+            
+        start_marker = "<!-- STATIC_LINKS_START -->"
+        end_marker = "<!-- STATIC_LINKS_END -->"
+        placeholder = "<!-- STATIC_LINKS_PLACEHOLDER -->"
+        
+        injection = f"{start_marker}\n{html_output}\n{end_marker}"
+        
+        # Regex for existing block
+        pattern = re.compile(f"{re.escape(start_marker)}.*?{re.escape(end_marker)}", re.DOTALL)
+        
+        if pattern.search(content):
+            new_content = re.sub(pattern, injection, content)
+            print("[+] Updated existing noscript fallback.")
+        elif placeholder in content:
+            new_content = content.replace(placeholder, injection)
+            print("[+] Injected new noscript fallback.")
+        else:
+            print("[-] Warning: No placeholder found for noscript fallback.")
+            return
+
+        output.write(index_path, new_content)
+
+
+def published_posts(conn):
+    """Metadata for every indexed post whose HTML output exists, newest first."""
+    return [
+        meta for meta in post_index.query(conn, base_url=BASE_URL)
+        if os.path.exists(os.path.join(OUTPUT_DIR, meta["filename"]))
+    ]
+
+def generate_all(posts, bodies=None):
+    """
+    Regenerates every index artifact from post metadata. bodies maps output
+    filenames to the plain text of each post, for the search index.
+    """
+    generate_sitemap(posts)
+    generate_rss(posts)
+    generate_json_index(posts)
+    generate_search_index(posts, bodies or {})
+    generate_noscript_fallback(posts)
+
+def reindex(content_dir=post_index.CONTENT_DIR):
+    """Rebuilds all index artifacts from stored metadata, without converting posts."""
+    conn = post_index.connect()
+    try:
+        post_index.refresh(conn, post_index.content_files(content_dir))
+        post_index.prune(conn)
+        posts = published_posts(conn)
+        bodies = post_index.body_texts(conn)
+        stale = post_index.stale_bodies(conn)
+    finally:
+        conn.close()
+
+    if stale:
+        print(f"[!] Warning: {len(stale)} post(s) changed since they were last converted; their text stays out "
+              f"of the search index until the next build: {', '.join(stale)}")
+    generate_all(posts, bodies)
+    return posts
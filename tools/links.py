@@ -0,0 +1,171 @@
+"""
+Link index for links between posts: [[name]], [[name|text]], [[name#heading]],
+[[#heading]] and [text](post.md#heading).
+
+post_index extracts each post's outgoing links, with their line numbers, when
+it parses the post. Converted posts store the ids their HTML defines.
+LinkIndex is built from those tables once per build. resolve() maps a link
+target to a post with one dict lookup, trying file names (slugs) first, then
+frontmatter aliases, then titles. Names are compared case-insensitively, with
+runs of spaces, dashes and underscores treated alike.
+
+The same data gives every post's backlinks and the list of broken links (no
+such post, or no such heading in it). It also gives a per-post digest of
+everything link-related on the post's page: where its links point and who
+links to it. The digest goes into the build fingerprint, so adding, renaming
+or deleting one post rebuilds exactly the pages that show it.
+
+Like post_index, this module doesn't import markdown. convert.py configures
+the toc extension with slugify(), so heading ids and link fragments agree.
+"""
+import os
+import re
+import json
+import hashlib
+import unicodedata
+
+# Neither form may span brackets or lines. Markdown links must be relative
+# (no scheme) and not images.
+LINK_PATTERN = re.compile(
+    r'\[\[(?P<wiki>[^\[\]\n]+?)\]\]'
+    r'|(?<!!)\[(?P<text>[^\[\]\n]*)\]\((?P<path>[^()\s:]+?)\.md(?P<fragment>#[^()\s]*)?\)'
+)
+ID_PATTERN = re.compile(r'\sid="([^"]+)"')
+
+
+def slugify(value, separator="-"):
+    """Heading text to an id, the way markdown's toc extension does it (and is configured to)."""
+    value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
+    value = re.sub(r"[^\w\s-]", "", value).strip().lower()
+    return re.sub(r"[{}\s]+".format(separator), separator, value)
+
+
+def link_key(name):
+    """Normalizes a link target, file name, alias or title for lookup."""
+    name = name.strip()
+    if name.lower().endswith(".md"):
+        name = name[:-3]
+    return re.sub(r"[\s_-]+", "-", name.lower()).strip("-")
+
+
+def parse(match):
+    """
+    Splits a LINK_PATTERN match into (target, anchor, text). target is a
+    link_key ("" for the page itself) and anchor is a heading id or None.
+    Returns None for links that are left alone ([[REDACTED]]).
+    """
+    wiki = match.group("wiki")
+    if wiki is None:
+        fragment = (match.group("fragment") or "")[1:]
+        return link_key(os.path.basename(match.group("path"))), fragment or None, match.group("text")
+
+    target, _, text = wiki.partition("|")
+    if "REDACTED" in target:
+        return None
+    name, _, heading = target.partition("#")
+    name, heading = name.strip(), heading.strip()
+    return link_key(name) if name else "", slugify(heading) if heading else None, text.strip() or name or heading
+
+
+def extract(body, first_line=1):
+    """(line, raw, target, anchor) for every link in a post body that starts on first_line of its file."""
+    found = []
+    line, pos = first_line, 0
+    for match in LINK_PATTERN.finditer(body):
+        parsed = parse(match)
+        if parsed is None:
+            continue
+        line += body.count("\n", pos, match.start())
+        pos = match.start()
+        found.append((line, match.group(0), parsed[0], parsed[1]))
+    return found
+
+
+def anchors(html):
+    """Every id a rendered page defines, i.e. every fragment a link may point at."""
+    return sorted(set(ID_PATTERN.findall(html)))
+
+
+def parse_aliases(value):
+    """Frontmatter `aliases: a, b` (or `[a, b]`) as a list."""
+    if not value:
+        return []
+    return [a.strip().strip('"\'') for a in value.strip("[]").split(",") if a.strip().strip('"\'')]
+
+
+class LinkIndex:
+    """
+    posts: [(source, filename, title)], aliases: [(source, alias)],
+    links: [(source, line, raw, target, anchor)], anchors: {filename: set of
+    ids} for every post converted so far.
+    """
+
+    def __init__(self, posts, aliases, links, anchors):
+        self.posts = {source: (filename, title or "") for source, filename, title in posts}
+        self.anchors = anchors
+        self.names = {}
+        # Earlier tiers win: a file name beats an alias, an alias beats a title
+        tiers = (
+            [(os.path.splitext(os.path.basename(source))[0], source) for source in sorted(self.posts)],
+            sorted((alias, source) for source, alias in aliases if source in self.posts),
+            sorted((title, source) for source, (_, title) in self.posts.items() if title),
+        )
+        for tier in tiers:
+            for name, source in tier:
+                self.names.setdefault(link_key(name), source)
+
+        self.outgoing = {}
+        incoming = {}
+        for source, line, raw, target, anchor in links:
+            if source not in self.posts:
+                continue
+            self.outgoing.setdefault(source, []).append((line, raw, target, anchor))
+            resolved = self.resolve(target, source)
+            if resolved and resolved != source:
+                incoming.setdefault(resolved, set()).add(source)
+        self.backlinks = {
+            target: sorted((self.posts[s][1], self.posts[s][0]) for s in sources)
+            for target, sources in incoming.items()
+        }
+        # Identifies this index, so pool workers can tell when to reload it
+        self.stamp = hashlib.sha256(
+            json.dumps([sorted(self.names.items()), sorted(self.backlinks.items())]).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def resolve(self, target, source=None):
+        """The source of the post target names (source itself for ""), or None."""
+        if target == "":
+            return source
+        return self.names.get(target)
+
+    def href(self, target, anchor, source):
+        """The URL a link from source points at, or None when the target doesn't exist."""
+        resolved = self.resolve(target, source)
+        if resolved is None:
+            return None
+        fragment = f"#{anchor}" if anchor else ""
+        return fragment if resolved == source and fragment else self.posts[resolved][0] + fragment
+
+    def backlinks_of(self, source):
+        """[(title, filename)] of the posts linking to source."""
+        return self.backlinks.get(source, [])
+
+    def digest(self, source):
+        """Hashes what source's page shows of the link graph: its resolved links and its backlinks."""
+        outgoing = [[target, anchor, self.resolve(target, source)] for _, _, target, anchor in self.outgoing.get(source, [])]
+        data = json.dumps([outgoing, self.backlinks_of(source)])
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+    def broken(self):
+        """Yields (source, line, raw, reason) for every link that leads nowhere, by file and line."""
+        for source in sorted(self.outgoing):
+            for line, raw, target, anchor in sorted(self.outgoing[source]):
+                resolved = self.resolve(target, source)
+                if resolved is None:
+                    yield source, line, raw, "no such post"
+                    continue
+                filename = self.posts[resolved][0]
+                ids = self.anchors.get(filename)
+                # Pages that were never converted have no known ids yet
+                if anchor and ids is not None and anchor not in ids:
+                    yield source, line, raw, f"no heading #{anchor} in {filename}"
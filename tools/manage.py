@@ -1,9 +1,17 @@
 #!/usr/bin/env python3
 import argparse
 import os
+import sys
+import json
 import datetime
-import subprocess
-import re
+
+import build_daemon
+import deploy
+import image_store
+import image_variants
+import post_index
+import precompress
+import timings
 
 CONTENT_DIR = "content"
 TEMPLATE_DIR = "templates"
@@ -57,62 +65,156 @@ Write your content here...
     
     print(f"[+] Created new post: {filepath}")
 
-def list_posts():
+def list_posts(category=None, since=None):
     if not os.path.exists(CONTENT_DIR):
         print("[-] Content directory not found.")
         return
 
+    posts = post_index.load_posts(content_dir=CONTENT_DIR, category=category, since=since)
+
     print(f"{'DATE':<12} | {'CATEGORY':<10} | {'TITLE'}")
     print("-" * 50)
     
-    files = [f for f in os.listdir(CONTENT_DIR) if f.endswith(".md")]
-    for file in files:
-        with open(os.path.join(CONTENT_DIR, file), "r", encoding="utf-8") as f:
-            content = f.read()
-            
-        title_match = re.search(r'title: "(.*?)"', content)
-        date_match = re.search(r'date: "(.*?)"', content)
-        cat_match = re.search(r'category: "(.*?)"', content)
-        
-        title = title_match.group(1) if title_match else "No Title"
-        date = date_match.group(1) if date_match else "----"
-        category = cat_match.group(1) if cat_match else "None"
+    for post in posts:
+        title = post.get("title") or "No Title"
+        date = post.get("date") or "----"
+        category = post.get("category") or "None"
         
         print(f"{date:<12} | {category:<10} | {title}")
 
-def build_site():
+def check_secrets(jobs=1):
+    """Aborts the build when content/ has findings that aren't in the secrets baseline."""
+    import scan_secrets
+    new = scan_secrets.check([CONTENT_DIR], jobs=jobs)
+    for filepath, (line, label, excerpt, _) in new:
+        print(f"  [!] Possible {label} in {filepath} on line {line}: {excerpt}...")
+    if new:
+        print(f"[-] Build aborted: {len(new)} new potential secret(s). Mark them with [[SECRET:...]], "
+              f"or accept them with: python tools/scan_secrets.py --update-baseline")
+        sys.exit(1)
+    print("[+] Secret scan passed (no new findings).")
+
+def check_links():
+    """
+    Lists every broken link between posts by file and line, and exits 1 if
+    there are any. Heading fragments are checked against the last build.
+    """
+    conn = post_index.connect()
+    try:
+        post_index.refresh(conn, post_index.content_files(CONTENT_DIR))
+        post_index.prune(conn)
+        index = post_index.link_index(conn)
+    finally:
+        conn.close()
+
+    broken = list(index.broken())
+    for source, line, raw, reason in broken:
+        print(f"  [!] {source}:{line}: {raw} ({reason})")
+    if broken:
+        print(f"[-] {len(broken)} broken link(s).")
+        sys.exit(1)
+    print(f"[+] No broken links ({sum(len(l) for l in index.outgoing.values())} link(s) checked).")
+
+def build_site(force=False, jobs=1, compress=False, minify=True, scan=False, report=None, use_daemon=True):
     print("[*] Building site...")
+    report = report or timings.Report()
     # Find all MD files in content/
-    files = [os.path.join(CONTENT_DIR, f) for f in os.listdir(CONTENT_DIR) if f.endswith(".md")]
+    files = sorted(os.path.join(CONTENT_DIR, f) for f in os.listdir(CONTENT_DIR) if f.endswith(".md"))
     if not files:
         print("[-] No markdown files found to build.")
         return
+
+    if scan:
+        check_secrets(jobs=jobs)
+        report.clock.lap("check_secrets")
         
-    cmd = ["python3", "tools/convert.py"] + files
-    subprocess.run(cmd)
+    # A running build daemon already has markdown and Pygments loaded
+    try:
+        built = use_daemon and build_daemon.build(files, force=force, jobs=jobs, compress=compress, minify_outputs=minify)
+    except RuntimeError as e:
+        print(f"[-] Build failed in the daemon: {e}")
+        sys.exit(1)
+    if not built:
+        # Imported here so that `new`/`list` don't pay for loading markdown and Pygments
+        import convert
+        report.clock.lap("load_converter")
+        convert.build(files, force=force, jobs=jobs, compress=compress, minify_outputs=minify, report=report)
 
-    # Cleanup: Remove HTML files that don't have a corresponding MD file
+    # Cleanup: remove published files under writeups/ that no post produces any more
     print("[*] Cleaning up old files...")
-    writeups_dir = "writeups"
-    if not os.path.exists(writeups_dir):
-        return
-
-    # Get list of expected HTML files
-    expected_htmls = {os.path.basename(f).replace(".md", ".html") for f in files}
-    
-    # Get list of actual HTML files
-    existing_htmls = set(os.listdir(writeups_dir))
-    
-    # Find orphans
-    orphans = existing_htmls - expected_htmls
-    
-    for orphan in orphans:
-        orphan_path = os.path.join(writeups_dir, orphan)
+    sources, images = image_store.referenced(files)
+    for image_path in image_store.prune(sources, images) + image_variants.prune(images):
+        print(f"[-] Removed unreferenced image: {image_path}")
+    manifest = deploy.build_manifest()
+    owned = {f"writeups/{post_index.output_name(f)}" for f in files}
+    for orphan_path in deploy.orphans(manifest, owned):
         try:
             os.remove(orphan_path)
+            del manifest["files"][orphan_path]
             print(f"[-] Removed orphaned file: {orphan_path}")
         except OSError as e:
             print(f"[!] Error removing {orphan_path}: {e}")
+    report.clock.lap("cleanup")
+
+    update_deploy_manifest(manifest)
+    report.clock.lap("deploy_manifest")
+
+def update_deploy_manifest(manifest=None):
+    """Writes the deploy manifest and says how it differs from the previous build's."""
+    manifest = manifest or deploy.build_manifest()
+    changes = deploy.diff(deploy.load_manifest(), manifest)
+    deploy.write_manifest(manifest)
+    print(f"[+] Deploy manifest: {len(manifest['files'])} file(s); {len(changes['upload'])} changed, "
+          f"{len(changes['delete'])} removed since the last build.")
+
+def diff_deploy(old, new=deploy.DEPLOY_MANIFEST_PATH, output_format="text"):
+    """Prints the files to upload and delete to turn the old deploy into the new one."""
+    old_manifest = deploy.load_manifest(old) if os.path.isfile(old) else deploy.load_revision(old)
+    if old_manifest is None:
+        print(f"[-] No deploy manifest at '{old}' (a manifest file, or a git revision with {deploy.DEPLOY_MANIFEST_PATH}).")
+        sys.exit(1)
+    new_manifest = deploy.load_manifest(new)
+    if new_manifest is None:
+        print(f"[-] No deploy manifest at '{new}'. Run `manage.py build` first.")
+        sys.exit(1)
+
+    changes = deploy.diff(old_manifest, new_manifest)
+    files = new_manifest["files"]
+    if output_format == "json":
+        json.dump({
+            "upload": [
+                {"path": path, "reason": reason, "size": files[path]["size"], "hash": files[path]["hash"],
+                 "cache_control": deploy.CACHE_POLICIES[files[path]["cache"]]}
+                for path, reason in changes["upload"]
+            ],
+            "delete": changes["delete"],
+            "unchanged": changes["unchanged"],
+            "bytes": changes["bytes"],
+        }, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+
+    for path, reason in changes["upload"]:
+        print(f"upload {path} ({reason}, {files[path]['cache']})")
+    for path in changes["delete"]:
+        print(f"delete {path}")
+    print(f"[*] {len(changes['upload'])} file(s) to upload ({changes['bytes']} bytes), "
+          f"{len(changes['delete'])} to delete, {changes['unchanged']} unchanged.")
+
+def reindex_site(compress=False):
+    """Regenerates sitemap, feed, posts.json and the noscript block from stored metadata."""
+    print("[*] Rebuilding indexes from post metadata...")
+    # indexes only needs post_index, so this never loads markdown or touches writeups/
+    import indexes
+    indexes.reindex(CONTENT_DIR)
+    precompress.refresh(compress=compress)
+    update_deploy_manifest()
+
+def serve_site(host="127.0.0.1", port=8000, watch=False, jobs=0, minify=True):
+    """Serves the site locally; with watch, rebuilds what changed and live-reloads the browser."""
+    # Imported here so that `new`/`list` don't pay for loading markdown and Pygments
+    import serve
+    serve.serve(host=host, port=port, watch_files=watch, jobs=jobs, minify_outputs=minify)
 
 def main():
     parser = argparse.ArgumentParser(description="Alterpix Site Manager")
@@ -126,18 +228,73 @@ def main():
     
     # List Posts
     parser_list = subparsers.add_parser("list", help="List all writeups")
+    parser_list.add_argument("--category", "-c", help="Only show posts in this category")
+    parser_list.add_argument("--since", "-s", help="Only show posts dated on/after this (e.g. 2026-01)")
     
     # Build
-    parser_build = subparsers.add_parser("build", help="Rebuild the site (run convert.py)")
+    parser_build = subparsers.add_parser("build", help="Rebuild the site (runs the convert.py pipeline)")
+    parser_build.add_argument("--force", "-f", action="store_true", help="Rebuild every post, ignoring the build manifest")
+    parser_build.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes for conversion (0 = one per CPU)")
+    parser_build.add_argument("--compress", "-z", action="store_true", help="Write .gz/.br/.zst siblings for the generated text files")
+    parser_build.add_argument("--no-minify", action="store_true", help="Keep HTML/CSS/JS output unminified")
+    parser_build.add_argument("--check-secrets", action="store_true", help="Abort if content/ has secret-scan findings missing from the baseline")
+    parser_build.add_argument("--timings", nargs="?", const=timings.DEFAULT_REPORT_PATH, metavar="PATH",
+                              help=f"Print per-stage/per-file timings and write them as JSON (default: {timings.DEFAULT_REPORT_PATH})")
+    parser_build.add_argument("--profile", metavar="PATH", help="Write a cProfile dump of the build to PATH (and folded stacks to PATH.folded)")
+    parser_build.add_argument("--no-daemon", action="store_true", help="Build in this process even if a build daemon is running")
+    
+    # Daemon
+    parser_daemon = subparsers.add_parser("daemon", help="Control the warm build daemon that `build` uses when it runs")
+    parser_daemon.add_argument("action", choices=("start", "stop", "status"), help="What to do")
+    
+    # Check links
+    subparsers.add_parser("check-links", help="List broken links between posts (exit 1 if any)")
+    
+    # Reindex
+    parser_reindex = subparsers.add_parser("reindex", help="Regenerate sitemap/feed/posts.json without converting posts")
+    parser_reindex.add_argument("--compress", "-z", action="store_true", help="Write .gz/.br/.zst siblings for the generated text files")
+    
+    # Diff deploy
+    parser_diff = subparsers.add_parser("diff-deploy", help="List the files to upload/delete since a previous deploy")
+    parser_diff.add_argument("old", help=f"Manifest of the deployed site: a file, or a git revision (uses its {deploy.DEPLOY_MANIFEST_PATH})")
+    parser_diff.add_argument("new", nargs="?", default=deploy.DEPLOY_MANIFEST_PATH,
+                             help=f"Manifest to deploy (default: {deploy.DEPLOY_MANIFEST_PATH}, written by build)")
+    parser_diff.add_argument("--format", choices=("text", "json"), default="text", help="Output format (default: text)")
+    
+    # Serve
+    parser_serve = subparsers.add_parser("serve", help="Preview the site locally (with --watch: rebuild on change + live reload)")
+    parser_serve.add_argument("--watch", "-w", action="store_true", help="Rebuild affected posts when content, templates, assets or images change")
+    parser_serve.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser_serve.add_argument("--port", "-p", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser_serve.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes for full rebuilds (0 = one per CPU)")
+    parser_serve.add_argument("--no-minify", action="store_true", help="Keep HTML/CSS/JS output unminified")
     
     args = parser.parse_args()
     
     if args.command == "new":
         create_new_post(args.title, args.category, args.template)
     elif args.command == "list":
-        list_posts()
+        list_posts(category=args.category, since=args.since)
     elif args.command == "build":
-        build_site()
+        report = timings.Report()
+        with timings.profiling(args.profile, report):
+            # Timings and profiles only cover this process, so they build in-process
+            build_site(force=args.force, jobs=args.jobs, compress=args.compress, minify=not args.no_minify,
+                       scan=args.check_secrets, report=report,
+                       use_daemon=not (args.no_daemon or args.timings or args.profile))
+        if args.timings:
+            report.summary()
+            report.write(args.timings)
+    elif args.command == "serve":
+        serve_site(host=args.host, port=args.port, watch=args.watch, jobs=args.jobs, minify=not args.no_minify)
+    elif args.command == "daemon":
+        build_daemon.control(args.action)
+    elif args.command == "check-links":
+        check_links()
+    elif args.command == "diff-deploy":
+        diff_deploy(args.old, args.new, args.format)
+    elif args.command == "reindex":
+        reindex_site(compress=args.compress)
     else:
         parser.print_help()
 
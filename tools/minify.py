@@ -0,0 +1,298 @@
+"""
+Conservative HTML, CSS and JavaScript minification.
+
+Nothing here parses the languages fully, so each minifier only makes changes
+that can't alter behaviour:
+  * HTML: comments are dropped (except the markers the build looks for again
+    on later runs, see PRESERVED_COMMENT), whitespace runs collapse to one
+    space and whitespace next to block-level tags goes. <pre>, <code> and
+    <textarea> are copied verbatim; inline <script>/<style> go through the
+    JS/CSS minifiers.
+  * CSS: comments go, whitespace collapses and disappears around { } ; , >
+    and after ':'; strings are left alone.
+  * JS: comments go and lines lose their indentation, but line breaks stay
+    (so automatic semicolon insertion still sees the same program); strings,
+    template literals and regex literals are copied verbatim.
+
+cached() memoises results on disk under CACHE_DIR, keyed by the input and
+the hash of this file.
+"""
+import os
+import re
+import hashlib
+
+CACHE_DIR = os.path.join(".build", "minify")
+
+PRESERVED_COMMENT = re.compile(r'<!--\s*(?:STATIC_LINKS_\w+|\w+_PLACEHOLDER|\[if\b|<!\[endif)')
+
+HTML_TOKEN_RE = re.compile(
+    r'<(?P<raw>pre|code|textarea|script|style)\b[^>]*>.*?</(?P=raw)\s*>'
+    r'|<!--.*?-->'
+    r'|<[!/]?[A-Za-z][^<>]*>'
+    r'|[^<]+|<',
+    re.DOTALL | re.IGNORECASE,
+)
+BLOCK_TAGS = {
+    "!doctype", "html", "head", "body", "title", "meta", "link", "script", "style", "noscript",
+    "div", "p", "ul", "ol", "li", "dl", "dt", "dd", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "footer", "nav", "section", "article", "aside", "main", "figure", "figcaption",
+    "pre", "blockquote", "table", "thead", "tbody", "tfoot", "tr", "td", "th", "hr", "br",
+    "form", "fieldset", "source",
+}
+JS_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+JS_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await"}
+
+
+def _tag_name(tag):
+    match = re.match(r'</?(!?[A-Za-z][A-Za-z0-9-]*)', tag)
+    return match.group(1).lower() if match else ""
+
+
+def _collapse_tag(tag):
+    """Collapses whitespace inside a tag, leaving quoted attribute values alone."""
+    return re.sub(r'("[^"]*"|\'[^\']*\')|\s+', lambda m: m.group(1) or " ", tag)
+
+
+def minify_html(html):
+    tokens = []
+    for match in HTML_TOKEN_RE.finditer(html):
+        token = match.group(0)
+        raw = (match.group("raw") or "").lower()
+        if raw in ("script", "style"):
+            open_end = token.index(">") + 1
+            close_start = token.lower().rindex("</")
+            body = token[open_end:close_start]
+            is_js = raw == "script" and not re.search(r'\btype="(?!text/javascript|module)', token[:open_end])
+            if raw == "style":
+                body = minify_css(body)
+            elif is_js:
+                body = minify_js(body)
+            tokens.append(("block", _collapse_tag(token[:open_end]) + body + token[close_start:]))
+        elif raw:
+            tokens.append(("inline", token))
+        elif token.startswith("<!--"):
+            if PRESERVED_COMMENT.match(token):
+                tokens.append(("block", token))
+        elif token.startswith("<") and len(token) > 1:
+            kind = "block" if _tag_name(token) in BLOCK_TAGS else "inline"
+            tokens.append((kind, _collapse_tag(token)))
+        else:
+            tokens.append(("text", re.sub(r'\s+', " ", token)))
+
+    out = []
+    for i, (kind, token) in enumerate(tokens):
+        if kind == "text":
+            prev_block = i == 0 or tokens[i - 1][0] == "block"
+            next_block = i + 1 == len(tokens) or tokens[i + 1][0] == "block"
+            if prev_block:
+                token = token.lstrip()
+            if next_block:
+                token = token.rstrip()
+            if not token:
+                continue
+        out.append(token)
+    return "".join(out)
+
+
+def _skip_string(text, i):
+    """Returns the index just past the quoted string starting at text[i]."""
+    quote = text[i]
+    i += 1
+    while i < len(text):
+        if text[i] == "\\":
+            i += 2
+            continue
+        if text[i] == quote:
+            return i + 1
+        i += 1
+    return i
+
+
+def minify_css(css):
+    out = []
+    i = 0
+    pending_space = False
+    while i < len(css):
+        ch = css[i]
+        if css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            i = len(css) if end == -1 else end + 2
+            pending_space = True
+            continue
+        if ch.isspace():
+            pending_space = True
+            i += 1
+            continue
+        if ch in "\"'":
+            end = _skip_string(css, i)
+            chunk = css[i:end]
+            i = end
+        else:
+            chunk = ch
+            i += 1
+        if pending_space and out and out[-1][-1] not in "{};,>:" and chunk not in "{};,>":
+            out.append(" ")
+        pending_space = False
+        if chunk == "}" and out and out[-1] == ";":
+            out.pop()
+        out.append(chunk)
+    return "".join(out)
+
+
+def _last_word(out):
+    match = re.search(r'([A-Za-z_$][\w$]*)\s*$', "".join(out[-3:]))
+    return match.group(1) if match else ""
+
+
+def minify_js(js):
+    out = []
+    stack = [["code", 0]]  # frames: ["code", brace depth] or ["tpl"]
+    i = 0
+    n = len(js)
+    line_start = True
+
+    def last_char():
+        for chunk in reversed(out):
+            stripped = chunk.rstrip(" \n")
+            if stripped:
+                return stripped[-1]
+        return ""
+
+    while i < n:
+        ch = js[i]
+        frame = stack[-1]
+
+        if frame[0] == "tpl":
+            if ch == "\\":
+                out.append(js[i:i + 2])
+                i += 2
+            elif ch == "`":
+                out.append(ch)
+                stack.pop()
+                i += 1
+            elif js.startswith("${", i):
+                out.append("${")
+                stack.append(["code", 1, "tpl"])
+                i += 2
+            else:
+                out.append(ch)
+                i += 1
+            continue
+
+        if ch == "\n":
+            # Keep line breaks (ASI) but drop trailing spaces and blank lines
+            while out and out[-1] == " ":
+                out.pop()
+            if out and out[-1] != "\n":
+                out.append("\n")
+            line_start = True
+            i += 1
+            continue
+        if ch in " \t\r":
+            if not line_start and out and out[-1] not in (" ", "\n"):
+                out.append(" ")
+            i += 1
+            continue
+        line_start = False
+
+        if js.startswith("//", i):
+            end = js.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        if js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            if out and out[-1] not in (" ", "\n"):
+                out.append(" ")
+            continue
+        if ch in "\"'":
+            end = _skip_string(js, i)
+            out.append(js[i:end])
+            i = end
+            continue
+        if ch == "`":
+            out.append(ch)
+            stack.append(["tpl"])
+            i += 1
+            continue
+        if ch == "/" and (last_char() in JS_REGEX_PRECEDERS or last_char() == "" or _last_word(out) in JS_REGEX_KEYWORDS):
+            # Regex literal: copy through the closing slash (ignoring ones in [...]) and flags
+            j = i + 1
+            in_class = False
+            while j < n and js[j] != "\n":
+                if js[j] == "\\":
+                    j += 2
+                    continue
+                if js[j] == "[":
+                    in_class = True
+                elif js[j] == "]":
+                    in_class = False
+                elif js[j] == "/" and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (js[j].isalnum() or js[j] in "_$"):
+                j += 1
+            out.append(js[i:j])
+            i = j
+            continue
+
+        if ch == "{":
+            frame[1] += 1
+        elif ch == "}":
+            frame[1] -= 1
+            if frame[1] == 0 and len(frame) > 2:
+                # End of a ${...} substitution: back inside the template literal
+                out.append(ch)
+                stack.pop()
+                i += 1
+                continue
+        out.append(ch)
+        i += 1
+
+    return "".join(out).strip()
+
+
+MINIFIERS = {"html": minify_html, "css": minify_css, "js": minify_js}
+
+
+def _source_hash():
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+_version = None
+
+
+def cached(kind, text):
+    """Minifies text with the minifier for kind ("html", "css" or "js"), via the on-disk cache."""
+    global _version
+    if _version is None:
+        _version = _source_hash()
+    key = hashlib.sha256(f"{kind}\n{_version}\n{text}".encode("utf-8")).hexdigest()
+    path = os.path.join(CACHE_DIR, key[:2], f"{key}.{kind}")
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return f.read()
+    except OSError:
+        pass
+
+    result = MINIFIERS[kind](text)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(result)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[!] Warning: Could not write minify cache entry: {e}")
+    return result
+
+
+def report(path, before, after):
+    """Prints the bytes saved for one file."""
+    before = len(before.encode("utf-8"))
+    after = len(after.encode("utf-8"))
+    saved = before - after
+    percent = 100.0 * saved / before if before else 0.0
+    print(f"[+] Minified {path}: {before} -> {after} bytes (-{saved}, {percent:.1f}%)")
@@ -0,0 +1,143 @@
+"""
+Atomic, write-if-changed output for the files a build generates.
+
+Every generated file goes through write() or, for generators that stream
+their output, OutputFile. The new bytes are compared with the file on disk,
+size first and then SHA-256. If they match, the file is left alone, mtime
+included, so a no-op rebuild rewrites no file and git, rsync and CDN
+invalidation only see real changes. Otherwise the bytes go to a temp file
+next to the target, which is then renamed over it. Readers (the preview
+server, a deploy) see either the old file or the new one, never half of one,
+and an interrupted build leaves the old file in place.
+
+Written and unchanged files are counted per process. report() prints the
+counts and reset() starts a new build. When pool workers write, they hand
+write()'s result back to the parent, which records it with tally().
+"""
+import os
+import hashlib
+
+_counts = {"written": 0, "unchanged": 0}
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def _matches(path, data):
+    """True when path already holds exactly data: same size, then same hash."""
+    try:
+        return os.path.getsize(path) == len(data) and _file_digest(path) == hashlib.sha256(data).digest()
+    except OSError:
+        return False
+
+
+def _tmp_path(path):
+    return f"{path}.{os.getpid()}.tmp"
+
+
+def _discard(tmp_path):
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+def tally(written):
+    _counts["written" if written else "unchanged"] += 1
+
+
+def counts():
+    return dict(_counts)
+
+
+def reset():
+    for key in _counts:
+        _counts[key] = 0
+
+
+def report():
+    print(f"[+] Outputs: {_counts['written']} written, {_counts['unchanged']} unchanged.")
+
+
+def write(path, data, encoding="utf-8"):
+    """
+    Writes data (str or bytes) to path unless path already holds exactly
+    those bytes. Returns True when the file was written.
+    """
+    if isinstance(data, str):
+        data = data.encode(encoding)
+    if _matches(path, data):
+        tally(False)
+        return False
+    tmp_path = _tmp_path(path)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+    tally(True)
+    return True
+
+
+class OutputFile:
+    """
+    A text file streamed to a temp file next to its target, for generators
+    too big to hold in memory (sitemap shards, the feed). The bytes are hashed
+    as they are written. commit() then applies write()'s rule: the temp file
+    replaces the target only if the bytes differ, and is deleted otherwise.
+    As a context manager it commits on success and discards on error.
+    """
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self._tmp_path = _tmp_path(path)
+        self._file = open(self._tmp_path, "wb")
+        self._hash = hashlib.sha256()
+        self._size = 0
+
+    def write(self, text):
+        data = text.encode(self.encoding)
+        self._file.write(data)
+        self._hash.update(data)
+        self._size += len(data)
+
+    def commit(self, path=None):
+        """
+        Closes the temp file and moves it to path (by default, the path it
+        was opened for) unless that file already holds the same bytes.
+        Returns True when written.
+        """
+        self._file.close()
+        path = path or self.path
+        try:
+            unchanged = os.path.getsize(path) == self._size and _file_digest(path) == self._hash.digest()
+        except OSError:
+            unchanged = False
+        if unchanged:
+            _discard(self._tmp_path)
+            tally(False)
+            return False
+        os.replace(self._tmp_path, path)
+        tally(True)
+        return True
+
+    def discard(self):
+        self._file.close()
+        _discard(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
@@ -0,0 +1,301 @@
+"""
+Persistent post metadata index, shared by manage.py and convert.py.
+
+Frontmatter for every post is kept in a SQLite database under .build/. A post
+is only re-read when its mtime or size changed, and only re-parsed when its
+content hash changed too, so listing or re-indexing a large archive costs a
+stat() per file rather than a full read. This module deliberately doesn't
+import markdown, so commands that only need metadata start fast.
+
+Parsing a post also records its aliases and outgoing links, and converted
+posts store the ids their HTML defines; link_index() builds a
+links.LinkIndex from them.
+"""
+import os
+import re
+import json
+import sqlite3
+import hashlib
+
+import links
+
+CONTENT_DIR = "content"
+DB_PATH = os.path.join(".build", "posts.db")
+# Bumped when parsing changes what is stored per post; older databases are re-parsed
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    source      TEXT PRIMARY KEY,
+    mtime_ns    INTEGER NOT NULL,
+    size        INTEGER NOT NULL,
+    hash        TEXT NOT NULL,
+    title       TEXT,
+    date        TEXT,
+    category    TEXT,
+    filename    TEXT,
+    meta        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_date ON posts (date);
+CREATE INDEX IF NOT EXISTS posts_category ON posts (category COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS bodies (
+    filename    TEXT PRIMARY KEY,
+    text        TEXT NOT NULL,
+    hash        TEXT
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    source      TEXT NOT NULL,
+    alias       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS aliases_source ON aliases (source);
+CREATE TABLE IF NOT EXISTS links (
+    source      TEXT NOT NULL,
+    line        INTEGER NOT NULL,
+    raw         TEXT NOT NULL,
+    target      TEXT NOT NULL,
+    anchor      TEXT
+);
+CREATE INDEX IF NOT EXISTS links_source ON links (source);
+CREATE TABLE IF NOT EXISTS anchors (
+    filename    TEXT PRIMARY KEY,
+    ids         TEXT NOT NULL
+);
+"""
+
+
+def parse_frontmatter(content):
+    """
+    Extracts YAML-style frontmatter from the markdown content.
+    Returns metadata dict and the remaining markdown content. A post without
+    a date has no "date" key; pages, feeds and listings show their own
+    fallback, so nothing generated depends on the day of the build.
+    """
+    meta = {
+        "title": "Untitled Writeup",
+        "category": "General",
+        "author": "Alterpix",
+        "description": "",
+        "tags": ""
+    }
+
+    frontmatter_pattern = r"^---\s+(.*?)\s+---\s+(.*)$"
+    match = re.search(frontmatter_pattern, content, re.DOTALL)
+
+    if match:
+        frontmatter_str = match.group(1)
+        markdown_content = match.group(2)
+
+        for line in frontmatter_str.split("\n"):
+            if ":" in line:
+                key, value = line.split(":", 1)
+                meta[key.strip().lower()] = value.strip().strip('"').strip("'")
+
+        # Auto-generate description if missing
+        if not meta["description"]:
+            # Basic heuristic: take first non-empty paragraph
+            paragraphs = [p.strip() for p in markdown_content.split('\n\n') if p.strip() and not p.strip().startswith('#') and not p.strip().startswith('!')]
+            if paragraphs:
+                meta["description"] = paragraphs[0][:150] + "..."
+
+        return meta, markdown_content
+    else:
+        return meta, content
+
+
+def output_name(source):
+    """The HTML file name a markdown source is published as."""
+    return os.path.basename(source).replace(".md", ".html")
+
+
+def connect(path=DB_PATH):
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        # Posts parsed by an older version lack what this one stores; bodies
+        # without a source hash are recreated by the next build
+        with conn:
+            conn.execute("DELETE FROM posts")
+            conn.execute("DROP TABLE IF EXISTS bodies")
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def content_files(content_dir=CONTENT_DIR):
+    if not os.path.exists(content_dir):
+        return []
+    return sorted(os.path.join(content_dir, f) for f in os.listdir(content_dir) if f.endswith(".md"))
+
+
+def refresh(conn, sources):
+    """
+    Brings the index up to date for the given markdown files.
+    Returns the number of posts that had to be re-parsed.
+    """
+    known = {
+        row["source"]: row
+        for row in conn.execute("SELECT source, mtime_ns, size, hash FROM posts")
+    }
+    parsed = 0
+
+    with conn:
+        for source in sources:
+            key = os.path.normpath(source)
+            try:
+                st = os.stat(source)
+            except OSError:
+                continue
+
+            row = known.get(key)
+            if row and row["mtime_ns"] == st.st_mtime_ns and row["size"] == st.st_size:
+                continue
+
+            with open(source, "rb") as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+
+            if row and row["hash"] == digest:
+                # Touched but not modified
+                conn.execute(
+                    "UPDATE posts SET mtime_ns = ?, size = ? WHERE source = ?",
+                    (st.st_mtime_ns, st.st_size, key),
+                )
+                continue
+
+            text = raw.decode("utf-8")
+            meta, body = parse_frontmatter(text)
+            conn.execute(
+                "INSERT OR REPLACE INTO posts (source, mtime_ns, size, hash, title, date, category, filename, meta)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, st.st_mtime_ns, st.st_size, digest, meta.get("title"), meta.get("date"),
+                 meta.get("category"), output_name(source), json.dumps(meta)),
+            )
+            conn.execute("DELETE FROM aliases WHERE source = ?", (key,))
+            conn.executemany(
+                "INSERT INTO aliases (source, alias) VALUES (?, ?)",
+                [(key, alias) for alias in links.parse_aliases(meta.get("aliases") or meta.get("alias"))],
+            )
+            # The body is the tail of the file; count the lines in front of it
+            first_line = text.count("\n", 0, len(text) - len(body)) + 1
+            conn.execute("DELETE FROM links WHERE source = ?", (key,))
+            conn.executemany(
+                "INSERT INTO links (source, line, raw, target, anchor) VALUES (?, ?, ?, ?, ?)",
+                [(key,) + link for link in links.extract(body, first_line)],
+            )
+            parsed += 1
+
+    return parsed
+
+
+def prune(conn):
+    """Drops posts whose source file no longer exists. Returns how many."""
+    missing = [row["source"] for row in conn.execute("SELECT source FROM posts") if not os.path.exists(row["source"])]
+    with conn:
+        conn.executemany("DELETE FROM posts WHERE source = ?", [(s,) for s in missing])
+        conn.execute("DELETE FROM bodies WHERE filename NOT IN (SELECT filename FROM posts)")
+        conn.execute("DELETE FROM aliases WHERE source NOT IN (SELECT source FROM posts)")
+        conn.execute("DELETE FROM links WHERE source NOT IN (SELECT source FROM posts)")
+        conn.execute("DELETE FROM anchors WHERE filename NOT IN (SELECT filename FROM posts)")
+    return len(missing)
+
+
+def query(conn, category=None, since=None, base_url=None):
+    """
+    Returns post metadata dicts (as process_file returns them), newest first.
+    `since` is a date prefix such as "2026-01" or "2026-01-15". The absolute
+    `url` key is only filled in when base_url is given.
+    """
+    sql = "SELECT filename, meta FROM posts"
+    clauses = []
+    params = []
+    if category:
+        clauses.append("category = ? COLLATE NOCASE")
+        params.append(category)
+    if since:
+        clauses.append("date >= ?")
+        params.append(since)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY date DESC, source ASC"
+
+    posts = []
+    for row in conn.execute(sql, params):
+        meta = json.loads(row["meta"])
+        meta["filename"] = row["filename"]
+        if base_url:
+            meta["url"] = f"{base_url}/writeups/{row['filename']}"
+        posts.append(meta)
+    return posts
+
+
+def set_body_text(conn, filename, text, source_hash):
+    """Stores the plain text of a rendered post, for the search index, with the hash of the source it came from."""
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO bodies (filename, text, hash) VALUES (?, ?, ?)",
+            (filename, text, source_hash),
+        )
+
+
+def body_texts(conn):
+    """
+    Returns {output filename: plain text body} for every converted post whose
+    source hasn't changed since (see stale_bodies).
+    """
+    return {
+        row["filename"]: row["text"]
+        for row in conn.execute(
+            "SELECT bodies.filename, bodies.text FROM bodies"
+            " JOIN posts ON posts.filename = bodies.filename AND posts.hash = bodies.hash"
+        )
+    }
+
+
+def body_hashes(conn):
+    """Returns {output filename: hash of the source its stored body was rendered from}."""
+    return {row["filename"]: row["hash"] for row in conn.execute("SELECT filename, hash FROM bodies")}
+
+
+def stale_bodies(conn):
+    """Output filenames of posts edited since their stored body was rendered, sorted."""
+    return [
+        row["filename"]
+        for row in conn.execute(
+            "SELECT bodies.filename FROM bodies JOIN posts ON posts.filename = bodies.filename"
+            " WHERE bodies.hash IS NULL OR posts.hash != bodies.hash ORDER BY bodies.filename"
+        )
+    ]
+
+
+def set_anchors(conn, filename, ids):
+    """Stores the ids a rendered post defines, for checking links to its headings."""
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO anchors (filename, ids) VALUES (?, ?)", (filename, json.dumps(ids)))
+
+
+def link_index(conn):
+    """Builds the links.LinkIndex for every indexed post."""
+    return links.LinkIndex(
+        [(row["source"], row["filename"], row["title"]) for row in conn.execute("SELECT source, filename, title FROM posts")],
+        [(row["source"], row["alias"]) for row in conn.execute("SELECT source, alias FROM aliases")],
+        [tuple(row) for row in conn.execute("SELECT source, line, raw, target, anchor FROM links ORDER BY source, line")],
+        {row["filename"]: set(json.loads(row["ids"])) for row in conn.execute("SELECT filename, ids FROM anchors")},
+    )
+
+
+def load_posts(sources=None, content_dir=CONTENT_DIR, **filters):
+    """
+    Convenience wrapper: refreshes the index for the content directory (or the
+    given sources), drops deleted posts and returns the matching metadata.
+    """
+    conn = connect()
+    try:
+        refresh(conn, content_files(content_dir) if sources is None else sources)
+        prune(conn)
+        return query(conn, **filters)
+    finally:
+        conn.close()
@@ -0,0 +1,202 @@
+"""
+Single-pass HTML rewriting for converted writeups.
+
+The HTML coming out of Markdown is split into tag/comment/text tokens by one
+linear scan, and every token is offered to each registered transform in turn.
+Adding a transform therefore doesn't add another pass over the document.
+
+A transform is registered as a factory: it is called once per document and
+must return a handler `handle(kind, token)`, where kind is "tag", "comment" or
+"text". The handler returns the string to emit in place of the token (the
+token itself to leave it alone, "" to drop it). Handlers may keep
+per-document state in their closure. A handler that buffers tokens and emits
+them later as one chunk wraps that chunk in Raw(); raw chunks skip the
+remaining transforms, so transforms that need to see the inside of a
+buffered block must be registered before the one buffering it. The optional
+`finish()` attribute on a handler is called at the end of the document and
+its return value appended.
+"""
+import re
+
+import image_variants
+
+TOKEN_RE = re.compile(r'<!--.*?-->|<[!/]?[A-Za-z][^<>]*>|<|[^<]+', re.DOTALL)
+
+SITE_DOMAIN = "alterpix.github.io"
+
+TRANSFORMS = []
+
+
+def register(factory):
+    """Adds a transform factory to the rewrite pass (usable as a decorator)."""
+    TRANSFORMS.append(factory)
+    return factory
+
+
+def tokenize(html):
+    """Yields (kind, token) pairs covering the whole document."""
+    for match in TOKEN_RE.finditer(html):
+        token = match.group(0)
+        if token.startswith("<!--"):
+            yield "comment", token
+        elif len(token) > 1 and token[0] == "<":
+            yield "tag", token
+        else:
+            yield "text", token
+
+
+class Raw(str):
+    """Markup emitted by a buffering transform; later transforms skip it."""
+
+
+def rewrite(html, transforms=None):
+    """Runs every registered transform over html in a single pass."""
+    handlers = [factory() for factory in (TRANSFORMS if transforms is None else transforms)]
+    out = []
+
+    for kind, token in tokenize(html):
+        for handle in handlers:
+            token = handle(kind, token)
+            if not token or isinstance(token, Raw):
+                break
+        if token:
+            out.append(token)
+
+    for handle in handlers:
+        finish = getattr(handle, "finish", None)
+        if finish:
+            out.append(finish())
+
+    return "".join(out)
+
+
+def tag_name(tag):
+    """Returns the lower-case element name of a start or end tag."""
+    match = re.match(r'</?([A-Za-z][A-Za-z0-9-]*)', tag)
+    return match.group(1).lower() if match else ""
+
+
+def get_attr(tag, name):
+    match = re.search(r'\s%s="([^"]*)"' % re.escape(name), tag)
+    return match.group(1) if match else None
+
+
+# --- Built-in transforms (order matters, see module docstring) ---
+
+@register
+def redactions():
+    """
+    Replaces [[REDACTED]] text with styled spans. Runs after markdown
+    conversion, so it works inside code blocks too.
+    """
+    replacement = '<span class="redacted" title="[TOP SECRET] DATA EXPUNGED">[SECRET]</span>'
+
+    def handle(kind, token):
+        if kind == "text" and "[[REDACTED]]" in token:
+            return token.replace("[[REDACTED]]", replacement)
+        return token
+    return handle
+
+
+@register
+def external_links():
+    """Secure External Links (Reverse SEO / Tabnabbing Protection)."""
+    def handle(kind, token):
+        if kind != "tag" or not token.startswith("<a ") or " target=" in token:
+            return token
+        url = get_attr(token, "href")
+        if url and url.startswith("http") and SITE_DOMAIN not in url:
+            return token[:-1] + ' target="_blank" rel="noopener noreferrer">'
+        return token
+    return handle
+
+
+@register
+def responsive_images():
+    """
+    Gives local images lazy loading and async decoding and, when their
+    variants exist (Pillow is installed and the file is a raster image), their
+    intrinsic width/height and responsive variants (a <picture> with srcset
+    and sizes per format).
+    """
+    def handle(kind, token):
+        if kind != "tag" or tag_name(token) != "img" or " srcset=" in token:
+            return token
+        src = get_attr(token, "src")
+        if not src or not src.startswith("../assets/img/"):
+            return token
+        entry = image_variants.variants(src[len("../"):])
+
+        attrs = ""
+        if entry is not None and " width=" not in token:
+            attrs += f' width="{entry["width"]}" height="{entry["height"]}"'
+        if " loading=" not in token:
+            attrs += ' loading="lazy" decoding="async"'
+        end = " />" if token.endswith(" />") else ">"
+        img = token[:-len(end)] + attrs + end
+
+        if entry is None:
+            return img
+
+        sources = image_variants.srcsets(entry)
+        if not sources:
+            return img
+        return "<picture>" + "".join(
+            f'<source type="{mime}" srcset="{srcset}" sizes="{image_variants.SIZES}">'
+            for mime, srcset in sources
+        ) + img + "</picture>"
+    return handle
+
+
+def terminal_title(text_content):
+    """Guesses the terminal card title from the plain text of a code block."""
+    if "nmap" in text_content or "sudo" in text_content or "$ " in text_content or "bash" in text_content:
+        return "BASH_SHELL"
+    elif "python" in text_content or "def " in text_content or "print(" in text_content:
+        return "PYTHON_SCRIPT"
+    return "TERMINAL"
+
+
+@register
+def terminal_cards():
+    """Wraps codehilite blocks in the Terminal Card markup."""
+    state = {"depth": 0, "html": [], "text": []}
+
+    def handle(kind, token):
+        if state["depth"] == 0:
+            if kind == "tag" and token == '<div class="codehilite">':
+                state["depth"] = 1
+                state["html"] = [token]
+                state["text"] = []
+                return ""
+            return token
+
+        # Inside a code block: buffer until its own </div>
+        state["html"].append(token)
+        if kind == "text":
+            state["text"].append(token)
+        elif kind == "tag" and tag_name(token) == "div":
+            state["depth"] += -1 if token.startswith("</") else 1
+            if state["depth"] == 0:
+                text_content = re.sub(r'<[^>]+>', '', "".join(state["text"]))
+                return Raw(_card("".join(state["html"]), terminal_title(text_content)))
+        return ""
+
+    def finish():
+        # Unterminated block: emit it unwrapped rather than losing it
+        return Raw("".join(state["html"])) if state["depth"] else ""
+
+    handle.finish = finish
+    return handle
+
+
+def _card(code_block, title):
+    return f"""<div class="code-terminal">
+    <div class="terminal-header">
+        <div class="dot red"></div>
+        <div class="dot yellow"></div>
+        <div class="dot green"></div>
+        <div class="title">{title}</div>
+    </div>
+    <div class="terminal-body">{code_block}</div>
+</div>"""
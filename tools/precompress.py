@@ -0,0 +1,208 @@
+"""
+Pre-compressed siblings for the text files the site serves.
+
+With --compress, every text artifact above MIN_SIZE gets `.gz` (and `.br` /
+`.zst` when the brotli / zstandard modules are installed) siblings written at
+the maximum level, so a CDN or the preview server can hand out pre-compressed
+bytes without spending CPU per request. Output is deterministic (gzip with
+mtime=0), siblings that wouldn't be smaller than the file are not written,
+and work is spread over a process pool.
+
+The state file remembers the hash each file's siblings were made from, so
+unchanged files are skipped. Builds without --compress still call refresh()
+with compress=False, which deletes siblings that no longer match their file:
+a stale .gz is worse than none.
+"""
+import os
+import gzip
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import output
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+    zstd = None
+
+STATE_PATH = os.path.join(".build", "precompress.json")
+MIN_SIZE = 1024
+TEXT_EXTENSIONS = (".html", ".xml", ".json", ".txt", ".css", ".js", ".svg")
+# Files and directories (scanned recursively) that are served to visitors
+ROOTS = (
+    "index.html", "posts.json", "feed.xml", "robots.txt", "sw.js", "asset-manifest.json",
+    "writeups", "data", "assets/css", "assets/js", "assets/live2d",
+)
+SITEMAP_PREFIX = "sitemap"
+SUFFIXES = (".gz", ".br", ".zst")
+ZSTD_LEVEL = 22
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+def _zstd(data):
+    if zstd is not None:
+        return zstd.compress(data, level=ZSTD_LEVEL)
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+def encoders():
+    """Returns {suffix: compress function} for the codecs available here."""
+    found = {".gz": _gzip}
+    if brotli is not None:
+        found[".br"] = _brotli
+    if zstd is not None or zstandard is not None:
+        found[".zst"] = _zstd
+    return found
+
+
+def strip_sibling(name):
+    """Maps a pre-compressed sibling's name to its file's name (others unchanged)."""
+    for suffix in SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def artifacts():
+    """Every text file under ROOTS (plus the sitemaps) worth compressing."""
+    paths = set()
+    for name in os.listdir("."):
+        if name.startswith(SITEMAP_PREFIX) and name.endswith(".xml"):
+            paths.add(name)
+    for root in ROOTS:
+        if os.path.isfile(root):
+            paths.add(root)
+        elif os.path.isdir(root):
+            for dirpath, _, files in os.walk(root):
+                for name in files:
+                    paths.add(os.path.join(dirpath, name).replace(os.sep, "/"))
+    return sorted(
+        p for p in paths
+        if p.endswith(TEXT_EXTENSIONS) and os.path.getsize(p) >= MIN_SIZE
+    )
+
+
+def _compress_file(path):
+    """Worker: writes the siblings for one file. Returns (path, hash, suffixes, saved bytes)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    written = []
+    saved = 0
+    for suffix, compress in encoders().items():
+        packed = compress(data)
+        target = path + suffix
+        if len(packed) >= len(data):
+            if os.path.exists(target):
+                os.remove(target)
+            continue
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(packed)
+        os.replace(tmp_path, target)
+        written.append(suffix)
+        saved += len(data) - len(packed)
+    return path, digest, written, saved
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_state():
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    output.write(STATE_PATH, json.dumps(state, indent=2, sort_keys=True))
+
+
+def _remove_siblings(path):
+    for suffix in SUFFIXES:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def refresh(compress=True, jobs=1):
+    """
+    Brings the compressed siblings up to date. With compress=False nothing is
+    compressed; siblings of files that changed or vanished are deleted instead.
+    """
+    state = load_state()
+    codecs = sorted(encoders())
+    current = artifacts()
+    current_set = set(current)
+
+    # Siblings whose file is gone or fell under MIN_SIZE
+    for path in list(state):
+        if path not in current_set:
+            _remove_siblings(path)
+            del state[path]
+
+    stale = []
+    for path in current:
+        entry = state.get(path)
+        if not compress and not entry:
+            continue
+        digest = _file_hash(path)
+        unchanged = entry and entry["hash"] == digest
+        if not compress:
+            # Siblings made from other bytes must go; valid ones are kept
+            if not unchanged:
+                _remove_siblings(path)
+                del state[path]
+            continue
+        if unchanged and entry["codecs"] == codecs and all(os.path.exists(path + s) for s in entry["written"]):
+            continue
+        stale.append(path)
+
+    if not compress:
+        save_state(state)
+        return 0
+
+    saved = 0
+    if stale:
+        # Same meaning as convert.py --jobs: 0 means one worker per CPU
+        if not jobs or jobs < 0:
+            jobs = os.cpu_count() or 1
+        jobs = min(jobs, len(stale))
+        if jobs <= 1:
+            results = [_compress_file(p) for p in stale]
+        else:
+            print(f"[*] Compressing {len(stale)} file(s) with {jobs} workers...", flush=True)
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(_compress_file, stale, chunksize=8))
+        for path, digest, written, file_saved in results:
+            state[path] = {"hash": digest, "codecs": codecs, "written": written}
+            saved += file_saved
+
+    save_state(state)
+    print(f"[+] Pre-compressed {len(stale)} file(s) ({', '.join(codecs)}), "
+          f"{len(current) - len(stale)} unchanged, {saved} byte(s) saved.")
+    return len(stale)
@@ -2,65 +2,501 @@
 import os
 import re
 import sys
+import json
+import hashlib
+import argparse
+import subprocess
+from bisect import bisect_right
 
 CONTENT_DIR = "content"
 
-# Regex patterns for potential secrets
+# Text files worth scanning when a directory is given
+SCAN_EXTENSIONS = (".md", ".html", ".txt", ".log", ".json", ".xml", ".csv", ".yml", ".yaml",
+                   ".ini", ".cfg", ".conf", ".py", ".js", ".css", ".sh")
+SKIP_DIRS = {".git", ".build", "node_modules", "__pycache__"}
+
+# Findings are cached per file (keyed by content hash, checked by mtime/size
+# first), so a run over an unchanged tree reads no file at all. Findings that
+# were reviewed and accepted live in the baseline by fingerprint; only findings
+# missing from it fail the scan.
+CACHE_PATH = os.path.join(".build", "secrets_cache.json")
+BASELINE_PATH = ".secrets-baseline.json"
+FINGERPRINT_LENGTH = 20
+
+# Scanning is two-stage. A prefilter finds the lines that could possibly
+# match using only cheap whole-buffer operations (bytes.find for literals,
+# bytes.translate to reduce AWS keys and IPs to searchable shapes), and for
+# each line which patterns could. Every trigger is something its pattern
+# can't match without, so skipping a pattern on a line without its trigger
+# never loses a finding. The patterns that do run each get their own finditer
+# over the whole line: matches of different patterns may overlap (an email
+# inside a token value, an AWS key inside an email), so they can't share one
+# alternation. Patterns never cross a line break, so results are the same as
+# running every pattern over every line (bench.py checks this). IP addresses
+# are matched once and classified in classify_ip().
 PATTERNS = {
-    "IP Address (Private)": r"\b(?:10|172\.(?:1[6-9]|2[0-9]|3[0-1])|192\.168)\.\d{1,3}\.\d{1,3}\b",
-    "IP Address (Public)": r"\b(?!(?:10|172\.(?:1[6-9]|2[0-9]|3[0-1])|192\.168|127)\.)\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b",
-    "Email Address": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
-    "Potential Password/Token": r"(?i)(password|passwd|pwd|secret|token|key|api_key|access_key)[\s]*[:=][\s]*[\"']?([a-zA-Z0-9@#$%^&*!]{8,})[\"']?",
-    "AWS Key": r"(?<![A-Z0-9])[A-Z0-9]{20}(?![A-Z0-9])", # Rough check for AWS Access Key ID
-    "Private Key Block": r"-----BEGIN [A-Z ]+ PRIVATE KEY-----"
+    "ip": rb"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b",
+    "email": rb"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
+    "token": rb"(?i:(password|passwd|pwd|secret|token|key|api_key|access_key)[ \t]*[:=][ \t]*[\"']?([a-zA-Z0-9@#$%^&*!]{8,})[\"']?)",
+    "aws": rb"(?<![A-Z0-9])[A-Z0-9]{20}(?![A-Z0-9])",  # Rough check for AWS Access Key ID
+    "private_key": rb"-----BEGIN [A-Z ]+ PRIVATE KEY-----",
+}
+LABELS = {
+    "email": "Email Address",
+    "token": "Potential Password/Token",
+    "aws": "AWS Key",
+    "private_key": "Private Key Block",
 }
+# Stable rule ids (JSON/SARIF output, fingerprints) for every label a finding can have
+RULES = {
+    "IP Address (Private)": "private-ip",
+    "IP Address (Public)": "public-ip",
+    "Email Address": "email",
+    "Potential Password/Token": "password-token",
+    "AWS Key": "aws-key",
+    "Private Key Block": "private-key",
+}
+COMPILED = {name: re.compile(p) for name, p in PATTERNS.items()}
+
+# Prefilter triggers: a line can only match a pattern if it contains its trigger
+LITERAL_TRIGGERS = ((b"@", "email"), (b"PRIVATE KEY-----", "private_key"))
+# Searched in the lower-cased buffer ("passw" covers password/passwd, "key" the *_key names)
+KEYWORD_TRIGGERS = (b"passw", b"pwd", b"secret", b"token", b"key")
+# With every digit mapped to "0", a dotted quad starts with the literal "0." which
+# the regex engine can search for quickly
+IP_SHAPE = bytes.maketrans(b"0123456789", b"0000000000")
+IP_TRIGGER = re.compile(rb"0\.0{1,3}\.0{1,3}\.0")
+# Maps A-Z/0-9 to "A" and everything else to ".", so a possible AWS key is a run of 20 "A"s
+AWS_SHAPE = bytes.maketrans(
+    bytes(range(256)),
+    bytes(ord("A") if chr(c).isascii() and (chr(c).isupper() or chr(c).isdigit()) else ord(".") for c in range(256)),
+)
+AWS_TRIGGER = b"A" * 20
+
+# Explicitly marked secrets (Good!) exempt their whole line
+SECRET_MARKER = b"[[SECRET:"
+NEWLINE = re.compile(b"\n")
+
+
+def classify_ip(ip):
+    """Returns the finding label for a dotted quad, or None (loopback, not an IP)."""
+    octets = [int(part) for part in ip.split(b".")]
+    if any(o > 255 for o in octets):
+        return None
+    first, second = octets[0], octets[1]
+    if first == 10 or (first == 172 and 16 <= second <= 31) or (first == 192 and second == 168):
+        return "IP Address (Private)"
+    if first == 127:
+        return None
+    return "IP Address (Public)"
+
+
+def _find_all(buf, literal):
+    pos = buf.find(literal)
+    while pos != -1:
+        yield pos
+        pos = buf.find(literal, pos + 1)
+
+
+def candidate_offsets(buf):
+    """Prefilter: (offset, pattern name) of every trigger in buf (a superset of the matches)."""
+    offsets = []
+    for literal, kind in LITERAL_TRIGGERS:
+        offsets.extend((pos, kind) for pos in _find_all(buf, literal))
+    lowered = buf.lower()
+    for literal in KEYWORD_TRIGGERS:
+        offsets.extend((pos, "token") for pos in _find_all(lowered, literal))
+    offsets.extend((pos, "aws") for pos in _find_all(buf.translate(AWS_SHAPE), AWS_TRIGGER))
+    offsets.extend((m.start(), "ip") for m in IP_TRIGGER.finditer(buf.translate(IP_SHAPE)))
+    return offsets
+
+
+def _findings(buf, start, end, kinds):
+    """Yields (label, matched bytes) for every hit of the kinds patterns in buf[start:end], pattern by pattern."""
+    for kind in PATTERNS:
+        if kind not in kinds:
+            continue
+        for match in COMPILED[kind].finditer(buf, start, end):
+            text = match.group(0)
+            label = classify_ip(text) if kind == "ip" else LABELS[kind]
+            if label:
+                yield label, text
+
+
+def scan_buffer(buf):
+    """Returns [(line number, label, excerpt, hash of the matched text)] for the bytes of a whole file."""
+    offsets = candidate_offsets(buf)
+    if not offsets:
+        return []
+
+    newlines = [m.start() for m in NEWLINE.finditer(buf)]
+    lines = {}
+    for offset, kind in offsets:
+        lines.setdefault(bisect_right(newlines, offset), set()).add(kind)
+    results = []
+    for index in sorted(lines):
+        start = newlines[index - 1] + 1 if index else 0
+        end = newlines[index] if index < len(newlines) else len(buf)
+        if buf.find(SECRET_MARKER, start, end) != -1:
+            continue
+        for label, text in _findings(buf, start, end, lines[index]):
+            excerpt = text.strip()[:50].decode("utf-8", errors="replace")
+            results.append((index + 1, label, excerpt, hashlib.sha256(text).hexdigest()))
+    return results
+
+
+def normalize(filepath):
+    """The repo-relative, forward-slash form of a path used in the cache and baseline."""
+    return os.path.relpath(filepath).replace(os.sep, "/")
+
+
+def fingerprint(findings, path):
+    """
+    Turns scan_buffer() results into [line, label, excerpt, fingerprint] entries.
+    The fingerprint covers the path, rule and matched text (plus which occurrence
+    of that text it is), but not the line, so edits elsewhere in the file don't
+    invalidate baseline entries.
+    """
+    seen = {}
+    entries = []
+    for line, label, excerpt, text_hash in findings:
+        key = (RULES[label], text_hash)
+        seen[key] = seen.get(key, -1) + 1
+        digest = hashlib.sha256(f"{path}\0{key[0]}\0{text_hash}\0{seen[key]}".encode("utf-8")).hexdigest()
+        entries.append([line, label, excerpt, digest[:FINGERPRINT_LENGTH]])
+    return entries
+
+
+def scan_path(filepath, known_hash=None):
+    """
+    Worker: scans one file. Returns (filepath, content hash, findings, error);
+    findings is None when the content still hashes to known_hash.
+    """
+    try:
+        with open(filepath, "rb") as f:
+            buf = f.read()
+    except Exception as e:
+        return filepath, None, [], str(e)
+    digest = hashlib.sha256(buf).hexdigest()
+    if digest == known_hash:
+        return filepath, digest, None, None
+    return filepath, digest, fingerprint(scan_buffer(buf), normalize(filepath)), None
+
+
+def _scan_task(task):
+    return scan_path(*task)
+
 
 def scan_file(filepath):
     print(f"[*] Scanning {filepath}...")
-    issues_found = 0
-    
+    _, _, findings, error = scan_path(filepath)
+    return report(findings, error)
+
+
+def report(findings, error=None):
+    if error:
+        print(f"  [ERROR] Failed to read file: {error}")
+    for line, label, excerpt, _ in findings:
+        print(f"  [!] Possible {label} on line {line}: {excerpt}...")
+    return len(findings)
+
+
+def collect_files(paths):
+    """Expands directories into the text files below them."""
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+        for root, dirs, names in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+            files.extend(os.path.join(root, n) for n in sorted(names) if n.endswith(SCAN_EXTENSIONS))
+    return files
+
+
+def scan_files(tasks, jobs=0):
+    """Scans (filepath, known hash) tasks (in parallel when worthwhile) and yields results in input order."""
+    if not jobs or jobs < 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(tasks))
+    if jobs <= 1:
+        for task in tasks:
+            yield _scan_task(task)
+        return
+    # Imported here so that runs answered from the cache don't pay for multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(_scan_task, tasks, chunksize=max(1, len(tasks) // (jobs * 4)))
+
+
+def _source_hash():
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _load_json(path):
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            content = f.readlines()
-            
-        for i, line in enumerate(content):
-            # Check for explicitly marked secrets (Good!)
-            if "[[SECRET:" in line:
-                # This is actually good, but maybe we want to list them to be sure
-                # print(f"  [INFO] Found marked secret on line {i+1}")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_json(path, data):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def load_cache():
+    """Returns {path: {"mtime_ns", "size", "hash", "findings"}}, empty when the scanner changed."""
+    cache = _load_json(CACHE_PATH)
+    if not isinstance(cache, dict) or cache.get("version") != _source_hash():
+        return {}
+    return cache.get("files", {})
+
+
+def save_cache(files):
+    _save_json(CACHE_PATH, {"version": _source_hash(), "files": files})
+
+
+def git_changed_files(ref):
+    """Repo-relative paths that differ from the git ref (committed, staged or not) plus untracked files."""
+    commands = (
+        ["git", "diff", "--name-only", "--relative", ref, "--"],
+        ["git", "ls-files", "--others", "--exclude-standard"],
+    )
+    changed = set()
+    for command in commands:
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"{' '.join(command)} failed")
+        changed.update(line.strip() for line in result.stdout.splitlines() if line.strip())
+    return changed
+
+
+def scan(paths, jobs=0, changed_ref=None, changed_only=False):
+    """
+    Scans the files under paths through the findings cache.
+
+    Files whose size and mtime match the cache are not even read; files that
+    were touched but hash the same are not rescanned. With changed_ref only
+    files that differ from that git ref are considered, with changed_only only
+    files that changed since the last run.
+
+    Returns {"files": [(path, findings, error)], "scanned": n, "cached": n}.
+    """
+    files = collect_files(paths)
+    if changed_ref:
+        changed = git_changed_files(changed_ref)
+        files = [f for f in files if normalize(f) in changed]
+
+    cache = load_cache()
+    dirty = False
+    results = {}
+    tasks = []
+    for filepath in files:
+        path = normalize(filepath)
+        entry = cache.get(path)
+        try:
+            st = os.stat(filepath)
+        except OSError as e:
+            results[filepath] = (filepath, [], str(e))
+            continue
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            if not changed_only:
+                results[filepath] = (filepath, entry["findings"], None)
+            continue
+        tasks.append((filepath, entry["hash"] if entry else None))
+
+    scanned = 0
+    for filepath, digest, findings, error in scan_files(tasks, jobs):
+        path = normalize(filepath)
+        if error:
+            results[filepath] = (filepath, [], error)
+            continue
+        st = os.stat(filepath)
+        if findings is None:
+            # Touched but identical: only the stat data is refreshed
+            findings = cache[path]["findings"]
+            if changed_only:
+                cache[path].update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                dirty = True
                 continue
-                
-            for name, pattern in PATTERNS.items():
-                matches = re.finditer(pattern, line)
-                for match in matches:
-                    print(f"  [!] Possible {name} on line {i+1}: {match.group(0).strip()[:50]}...")
-                    issues_found += 1
-                    
-    except Exception as e:
-        print(f"  [ERROR] Failed to read file: {e}")
-        
-    return issues_found
+        else:
+            scanned += 1
+        cache[path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "hash": digest, "findings": findings}
+        dirty = True
+        results[filepath] = (filepath, findings, None)
+
+    for path in [p for p in cache if not os.path.exists(p)]:
+        del cache[path]
+        dirty = True
+    if dirty:
+        save_cache(cache)
+
+    ordered = [results[f] for f in files if f in results]
+    return {"files": ordered, "scanned": scanned, "cached": len(ordered) - scanned}
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Returns the baseline entries as {fingerprint: entry}."""
+    data = _load_json(path) or {}
+    return {entry["fingerprint"]: entry for entry in data.get("findings", [])}
+
+
+def update_baseline(results, path=BASELINE_PATH):
+    """
+    Records every current finding of the scanned files as known. Entries of
+    files that weren't part of this scan are kept unless the file is gone.
+    Returns the number of entries.
+    """
+    scanned = {normalize(filepath) for filepath, _, error in results if not error}
+    entries = [
+        entry for entry in load_baseline(path).values()
+        if entry["path"] not in scanned and os.path.exists(entry["path"])
+    ]
+    for filepath, findings, error in results:
+        for line, label, _, digest in findings:
+            entries.append({"fingerprint": digest, "path": normalize(filepath), "rule": RULES[label], "line": line})
+    entries.sort(key=lambda e: (e["path"], e["line"], e["rule"], e["fingerprint"]))
+    _save_json(path, {"version": 1, "findings": entries})
+    return len(entries)
+
+
+def new_findings(results, baseline):
+    """The findings whose fingerprint isn't in the baseline, as [(path, finding)]."""
+    return [
+        (filepath, finding)
+        for filepath, findings, _ in results
+        for finding in findings
+        if finding[3] not in baseline
+    ]
+
+
+def check(paths=(CONTENT_DIR,), jobs=0, baseline_path=BASELINE_PATH):
+    """Scans paths and returns the findings not covered by the baseline (used by manage.py build)."""
+    return new_findings(scan(list(paths), jobs=jobs)["files"], load_baseline(baseline_path))
+
+
+def to_json(results, baseline, scanned, cached):
+    findings = [
+        {
+            "path": normalize(filepath),
+            "line": line,
+            "rule": RULES[label],
+            "label": label,
+            "excerpt": excerpt,
+            "fingerprint": digest,
+            "baselined": digest in baseline,
+        }
+        for filepath, file_findings, _ in results
+        for line, label, excerpt, digest in file_findings
+    ]
+    return {
+        "version": 1,
+        "summary": {
+            "files": len(results),
+            "scanned": scanned,
+            "cached": cached,
+            "new": sum(1 for f in findings if not f["baselined"]),
+            "baselined": sum(1 for f in findings if f["baselined"]),
+        },
+        "findings": findings,
+        "errors": [{"path": normalize(filepath), "error": error} for filepath, _, error in results if error],
+    }
+
+
+def to_sarif(results, baseline):
+    rules = sorted(set(RULES.values()))
+    labels = {rule: label for label, rule in RULES.items()}
+    sarif_results = []
+    for filepath, findings, _ in results:
+        for line, label, excerpt, digest in findings:
+            sarif_results.append({
+                "ruleId": RULES[label],
+                "ruleIndex": rules.index(RULES[label]),
+                "level": "note" if digest in baseline else "warning",
+                "message": {"text": f"Possible {label}: {excerpt}"},
+                "locations": [{
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": normalize(filepath)},
+                        "region": {"startLine": line},
+                    },
+                }],
+                "partialFingerprints": {"secretFingerprint/v1": digest},
+                "baselineState": "unchanged" if digest in baseline else "new",
+            })
+    return {
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {
+                "name": "scan_secrets",
+                "rules": [{"id": rule, "name": labels[rule], "shortDescription": {"text": f"Possible {labels[rule]}"}} for rule in rules],
+            }},
+            "results": sarif_results,
+        }],
+    }
+
 
 def main():
-    if not os.path.exists(CONTENT_DIR):
-        print(f"[-] Directory {CONTENT_DIR} not found.")
+    parser = argparse.ArgumentParser(description="Scan writeups for leaked IPs, credentials and keys")
+    parser.add_argument("paths", nargs="*", default=[CONTENT_DIR], help=f"Files or directories to scan (default: {CONTENT_DIR})")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes (0 = one per CPU)")
+    parser.add_argument("--changed", nargs="?", const="", metavar="REF",
+                        help="Only report files changed since the git REF, or since the last run when no REF is given")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help=f"Known findings to ignore (default: {BASELINE_PATH})")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the current findings as known and exit")
+    parser.add_argument("--format", choices=("text", "json", "sarif"), default="text", help="Output format (default: text)")
+    args = parser.parse_args()
+
+    missing = [p for p in args.paths if not os.path.exists(p)]
+    if missing:
+        print(f"[-] Directory {missing[0]} not found.")
         sys.exit(1)
-        
-    total_issues = 0
-    files = [os.path.join(CONTENT_DIR, f) for f in os.listdir(CONTENT_DIR) if f.endswith(".md")]
-    
-    print(f"[*] Starting scan of {len(files)} files in {CONTENT_DIR}...")
+
+    try:
+        outcome = scan(args.paths, jobs=args.jobs, changed_ref=args.changed or None, changed_only=args.changed == "")
+    except (RuntimeError, OSError) as e:
+        print(f"[-] Could not list changed files: {e}")
+        sys.exit(1)
+    results = outcome["files"]
+
+    if args.update_baseline:
+        count = update_baseline(results, args.baseline)
+        print(f"[+] Baseline {args.baseline} now lists {count} known finding(s).")
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    new = new_findings(results, baseline)
+
+    if args.format != "text":
+        document = to_json(results, baseline, outcome["scanned"], outcome["cached"]) if args.format == "json" else to_sarif(results, baseline)
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        sys.exit(1 if new else 0)
+
+    print(f"[*] Starting scan of {len(results)} files in {', '.join(args.paths)}...")
     print("-" * 50)
-    
-    for file in files:
-        total_issues += scan_file(file)
-        
+
+    known = 0
+    for filepath, findings, error in results:
+        print(f"[*] Scanning {filepath}...")
+        report([f for f in findings if f[3] not in baseline], error)
+        known += sum(1 for f in findings if f[3] in baseline)
+
     print("-" * 50)
-    if total_issues > 0:
-        print(f"[!] Scan completed. Found {total_issues} potential issues.")
+    print(f"[*] {outcome['scanned']} file(s) scanned, {outcome['cached']} from cache; {known} known finding(s) in {args.baseline}.")
+    if new:
+        print(f"[!] Scan completed. Found {len(new)} new potential issues.")
         sys.exit(1) # Return error code to fail CI/CD if needed
     else:
-        print("[+] Scan completed. No obvious issues found.")
+        print("[+] Scan completed. No new issues found.")
         sys.exit(0)
 
 if __name__ == "__main__":
@@ -0,0 +1,309 @@
+"""
+Local preview server with watch mode (`manage.py serve [--watch]`).
+
+The site is served from the repo root by a ThreadingHTTPServer. HTML pages
+get a small script injected (never written to disk) that listens on
+RELOAD_PATH, a server-sent events stream, and reloads the page after every
+rebuild. Files with pre-compressed siblings (see precompress) are sent
+pre-compressed when the browser accepts the encoding.
+
+With --watch a polling thread watches the posts in content/, the writeup
+template and its partials, the stylesheets and scripts, and every local image
+a post references. DependencyGraph maps each change to the work it needs:
+  * an edited or new post rebuilds that post and the indexes (convert.build()
+    also rebuilds the posts whose links or backlinks it changed)
+  * an edited image rebuilds the posts that reference it
+  * a deleted post loses its HTML and drops out of the indexes
+  * an edited template, partial, stylesheet or script runs the asset pass and
+    rebuilds every post, over --jobs workers
+Rebuilds go through convert.build() in this process, so Markdown, Pygments
+and the compiled template stay loaded between edits. Polling only stats
+files; a file is hashed when its stat changes, and touching it without
+changing its bytes triggers nothing.
+"""
+import os
+import time
+import hashlib
+import threading
+import mimetypes
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlsplit
+
+import convert
+import image_store
+import post_index
+import precompress
+import templating
+
+CONTENT_DIR = "content"
+RELOAD_PATH = "/__livereload"
+POLL_INTERVAL = 0.05
+# Editors often save in several steps (write temp, rename); wait for them to settle
+DEBOUNCE = 0.02
+KEEPALIVE = 15
+RELOAD_SNIPPET = (
+    "<script>new EventSource('" + RELOAD_PATH + "').onmessage = function () { location.reload(); };</script>"
+)
+# Accept-Encoding token and sibling suffix, preferred first
+ENCODINGS = (("br", ".br"), ("zstd", ".zst"), ("gzip", ".gz"))
+ASSET_DIRS = ("assets/css", "assets/js")
+
+
+def _hash_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class Reloader:
+    """A generation counter that SSE streams wait on; notify() bumps it after a rebuild."""
+
+    def __init__(self):
+        self.generation = 0
+        self._condition = threading.Condition()
+
+    def notify(self):
+        with self._condition:
+            self.generation += 1
+            self._condition.notify_all()
+
+    def wait(self, seen, timeout):
+        """Blocks until the generation differs from seen (or timeout). Returns the current one."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.generation != seen, timeout)
+            return self.generation
+
+
+class DependencyGraph:
+    """Knows which files each post depends on, and so which posts a change affects."""
+
+    def __init__(self, content_dir=CONTENT_DIR):
+        self.content_dir = content_dir
+        # post source -> local images it references
+        self.images = {}
+
+    def posts(self):
+        return post_index.content_files(self.content_dir)
+
+    def update(self, post):
+        try:
+            with open(post, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            self.images.pop(post, None)
+            return
+        self.images[post] = {os.path.relpath(p) for p in image_store.find_local_images(text, post)}
+
+    def forget(self, post):
+        self.images.pop(post, None)
+
+    def template_files(self):
+        return set(templating.source_files(convert.TEMPLATE_PATH))
+
+    def asset_files(self):
+        """Stylesheet and script sources (not the .min outputs the asset pass writes)."""
+        files = set()
+        for directory in ASSET_DIRS:
+            for root, _, names in os.walk(directory):
+                for name in names:
+                    if ".min." not in name and not name.endswith(".tmp") and precompress.strip_sibling(name) == name:
+                        files.add(os.path.join(root, name))
+        return files
+
+    def watched(self):
+        """Every file whose change means work."""
+        files = set(self.posts()) | self.template_files() | self.asset_files()
+        for images in self.images.values():
+            files |= images
+        return files
+
+    def affected(self, changed, removed):
+        """
+        Maps changed and removed paths to (posts to rebuild, posts deleted,
+        whether the asset pass has to run).
+        """
+        posts = set(self.posts())
+        shared = self.template_files() | self.asset_files()
+        rebuild = set()
+        deleted = {p for p in removed if p in self.images}
+        assets = False
+        for path in changed | removed:
+            if path in posts:
+                rebuild.add(path)
+            elif path in shared or path.startswith(ASSET_DIRS):
+                assets = True
+            else:
+                rebuild |= {post for post, images in self.images.items() if path in images}
+        if assets:
+            rebuild = posts
+        return rebuild & posts, deleted, assets
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def watch(graph, reloader, jobs=0, minify_outputs=True):
+    """Polls the watched files forever, rebuilding what each change affects."""
+    stats = {path: _stat(path) for path in graph.watched()}
+    hashes = {path: _hash_file(path) for path, st in stats.items() if st}
+    while True:
+        time.sleep(POLL_INTERVAL)
+        changed, removed = set(), set()
+        for path in graph.watched() | set(stats):
+            current = _stat(path)
+            if current == stats.get(path):
+                continue
+            if current is None:
+                removed.add(path)
+                stats.pop(path, None)
+                hashes.pop(path, None)
+                continue
+            stats[path] = current
+            digest = _hash_file(path)
+            if hashes.get(path) == digest:
+                continue  # Touched but not modified
+            hashes[path] = digest
+            changed.add(path)
+        if not changed and not removed:
+            continue
+        time.sleep(DEBOUNCE)
+        rebuild(graph, changed, removed, reloader, jobs, minify_outputs)
+        # Start tracking files the rebuild made relevant (new posts, newly referenced images)
+        for path in graph.watched():
+            if path not in stats:
+                stats[path] = _stat(path)
+                if stats[path]:
+                    hashes[path] = _hash_file(path)
+
+
+def rebuild(graph, changed, removed, reloader, jobs=0, minify_outputs=True):
+    started = time.perf_counter()
+    posts, deleted, assets = graph.affected(changed, removed)
+    for post in deleted:
+        graph.forget(post)
+        output = os.path.join(convert.OUTPUT_DIR, post_index.output_name(post))
+        for path in [output] + [output + suffix for suffix in precompress.SUFFIXES]:
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"[-] Removed {path}")
+    try:
+        convert.build(sorted(posts), jobs=jobs, minify_outputs=minify_outputs, assets=assets)
+    except Exception as e:
+        print(f"[-] Rebuild failed: {e}")
+        return
+    for post in posts:
+        graph.update(post)
+    reloader.notify()
+    elapsed = (time.perf_counter() - started) * 1000
+    what = "all posts (template/assets changed)" if assets else f"{len(posts)} post(s)"
+    print(f"[+] Rebuilt {what} in {elapsed:.0f} ms; reloading browsers.")
+
+
+def make_handler(reloader):
+    root = os.getcwd()
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=root, **kwargs)
+
+        def log_request(self, code="-", size="-"):
+            # Only failures are worth a line in the watch output
+            if isinstance(code, int) and code >= 400:
+                super().log_request(code, size)
+
+        def end_headers(self):
+            self.send_header("Cache-Control", "no-cache")
+            super().end_headers()
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == RELOAD_PATH:
+                return self.stream_reloads()
+            fs_path = self.translate_path(self.path)
+            if os.path.isdir(fs_path) and path.endswith("/"):
+                fs_path = os.path.join(fs_path, "index.html")
+            if fs_path.endswith(".html") and os.path.isfile(fs_path):
+                return self.send_page(fs_path)
+            if os.path.isfile(fs_path) and self.send_precompressed(fs_path):
+                return
+            return super().do_GET()
+
+        def send_page(self, fs_path):
+            with open(fs_path, "rb") as f:
+                html = f.read().decode("utf-8", errors="replace")
+            end = html.lower().rfind("</body>")
+            html = html[:end] + RELOAD_SNIPPET + html[end:] if end != -1 else html + RELOAD_SNIPPET
+            body = html.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_precompressed(self, fs_path):
+            accepted = {token.split(";")[0].strip() for token in self.headers.get("Accept-Encoding", "").split(",")}
+            for encoding, suffix in ENCODINGS:
+                sibling = fs_path + suffix
+                if encoding not in accepted or not os.path.isfile(sibling):
+                    continue
+                if os.path.getmtime(sibling) < os.path.getmtime(fs_path):
+                    continue  # Stale: the file changed after it was compressed
+                with open(sibling, "rb") as f:
+                    body = f.read()
+                self.send_response(200)
+                self.send_header("Content-Type", mimetypes.guess_type(fs_path)[0] or "application/octet-stream")
+                self.send_header("Content-Encoding", encoding)
+                self.send_header("Vary", "Accept-Encoding")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return True
+            return False
+
+        def stream_reloads(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            seen = reloader.generation
+            try:
+                while True:
+                    current = reloader.wait(seen, KEEPALIVE)
+                    self.wfile.write(b"data: reload\n\n" if current != seen else b": keepalive\n\n")
+                    self.wfile.flush()
+                    seen = current
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8000, watch_files=False, jobs=0, minify_outputs=True):
+    """Serves the site; with watch_files, rebuilds on changes and live-reloads open pages."""
+    reloader = Reloader()
+    server = ThreadingHTTPServer((host, port), make_handler(reloader))
+    server.daemon_threads = True
+
+    if watch_files:
+        graph = DependencyGraph()
+        print("[*] Initial build...")
+        posts = graph.posts()
+        convert.build(posts, jobs=jobs, minify_outputs=minify_outputs)
+        for post in posts:
+            graph.update(post)
+        threading.Thread(target=watch, args=(graph, reloader, jobs, minify_outputs), daemon=True).start()
+        print(f"[*] Watching {len(graph.watched())} file(s) for changes...")
+
+    print(f"[*] Serving http://{host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[*] Stopping server.")
+    finally:
+        server.server_close()
@@ -0,0 +1,309 @@
+"""
+Fingerprinting for the static files under assets/ and the service worker that
+caches them.
+
+Every file under FINGERPRINT_DIRS (plus anything the stylesheets point at) is
+hashed, and references to it are rewritten to `path?v=<hash>`:
+  * url(...) in the stylesheets
+  * file names in the Live2D model.json / textures.json
+  * "assets/..." string literals in index.html and the writeup template
+Stylesheets and scripts are first minified into `<name>.min.css` /
+`<name>.min.js` next to their source (unless they already are .min files),
+and page references are pointed at the minified output.
+
+Files are referenced under their real names, so the 45 MB Live2D bundle isn't
+duplicated in the repo for every change, yet every URL changes exactly when
+the file does. Rewriting is idempotent: an existing ?v= is replaced, and files
+are only written when their text changes (see output). Hashes go through a
+stat cache in STATE_PATH, so a build only re-reads the files whose mtime or
+size changed; unchanged Live2D textures aren't read at all.
+
+The result is written to ASSET_MANIFEST_PATH and baked into SERVICE_WORKER_PATH.
+The service worker precaches the files every page needs (stylesheets, scripts,
+the model and its default texture) and caches everything else in the manifest
+(motions, other textures) on first use. Requests are served cache-first by
+path at the current version, so repeat visits and texture switches hit the
+network only for files that actually changed.
+"""
+import os
+import re
+import json
+import hashlib
+from functools import partial
+
+import minify
+import output
+import precompress
+
+FINGERPRINT_DIRS = ("assets/css", "assets/js", "assets/live2d")
+PAGES = {
+    # page: directory its relative references resolve from
+    "index.html": ".",
+    "templates/writeup-template.html": "writeups",
+}
+ASSET_MANIFEST_PATH = "asset-manifest.json"
+STATE_PATH = os.path.join(".build", "assets.json")
+SERVICE_WORKER_PATH = "sw.js"
+HASH_LENGTH = 10
+MINIFY_EXTENSIONS = (".css", ".js")
+
+CSS_URL_PATTERN = re.compile(r'url\((?P<q>[\'"]?)(?P<path>[^\'")?#]+)(?:\?v=[0-9a-f]+)?(?P=q)\)')
+JSON_STRING_PATTERN = re.compile(r'"(?P<path>[^"?\\]+)(?:\?v=[0-9a-f]+)?"')
+PAGE_ASSET_PATTERN = re.compile(r'(?P<q>["\'`])(?P<path>(?:\.\./)*assets/[^"\'`?#\s]+)(?:\?v=[0-9a-f]+)?(?P=q)')
+
+SERVICE_WORKER_TEMPLATE = """// Generated by tools/static_assets.py, do not edit.
+const CACHE_NAME = 'alterpix-assets';
+const ASSETS = __ASSETS__;
+const PRECACHE = __PRECACHE__;
+
+const versionedUrl = path => new URL(`${path}?v=${ASSETS[path]}`, self.location).href;
+const current = new Set(Object.keys(ASSETS).map(versionedUrl));
+
+self.addEventListener('install', event => {
+  event.waitUntil(
+    caches.open(CACHE_NAME)
+      .then(cache => Promise.all(PRECACHE.map(path => {
+        const url = versionedUrl(path);
+        return cache.match(url).then(hit => hit || cache.add(url));
+      })))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', event => {
+  // Drop superseded versions; unchanged files stay cached across deploys
+  event.waitUntil(
+    caches.open(CACHE_NAME)
+      .then(cache => cache.keys().then(requests => Promise.all(
+        requests.filter(request => !current.has(request.url)).map(request => cache.delete(request))
+      )))
+      .then(() => self.clients.claim())
+  );
+});
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  if (request.method !== 'GET') return;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+
+  const path = decodeURIComponent(url.pathname).replace(/^\\//, '');
+  if (!(path in ASSETS)) return;
+
+  // Any reference to a known file (versioned or not) is served at its current version
+  const key = versionedUrl(path);
+  event.respondWith(
+    caches.open(CACHE_NAME).then(cache => cache.match(key).then(hit => hit || fetch(key).then(response => {
+      if (response.ok) cache.put(key, response.clone());
+      return response;
+    })))
+  );
+});
+"""
+
+
+def _hash_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()[:HASH_LENGTH]
+
+
+def _load_state():
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _cached_hash(path, state, new_state):
+    """_hash_file() unless state has the file at its current mtime and size. Records it in new_state."""
+    st = os.stat(path)
+    cached = state.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        digest = cached[2]
+    else:
+        digest = _hash_file(path)
+    new_state[path] = [st.st_mtime_ns, st.st_size, digest]
+    return digest
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def _repo_path(base_dir, ref):
+    """Resolves a reference made from base_dir to a repo-relative path, or None."""
+    path = os.path.normpath(os.path.join(base_dir, ref))
+    if path.startswith("..") or not os.path.isfile(path):
+        return None
+    return path.replace(os.sep, "/")
+
+
+def _rewrite(text, pattern, base_dir, hashes, hash_file, redirect=None):
+    """
+    Appends ?v=<hash> to every reference in text that resolves to a file.
+    hashes memoizes hash_file(path). redirect(path) may swap the file for
+    another one in the same directory.
+    """
+    def replace(match):
+        ref = match.group("path")
+        path = _repo_path(base_dir, ref)
+        stem, ext = os.path.splitext(ref)
+        if path is None and redirect and stem.endswith(".min"):
+            # A minified output that was removed again: fall back to its source
+            path = _repo_path(base_dir, stem[:-len(".min")] + ext)
+        if path is None:
+            return match.group(0)
+        if redirect:
+            target = redirect(path)
+            ref = ref[:len(ref) - len(os.path.basename(ref))] + os.path.basename(target)
+            path = target
+        if path not in hashes:
+            hashes[path] = hash_file(path)
+        # Keep everything up to the path, then the new version and the closing quote
+        return match.string[match.start():match.start("path")] + ref + f"?v={hashes[path]}" + _closing(match)
+    return pattern.sub(replace, text)
+
+
+def _closing(match):
+    """The part of a match after the path and its old ?v= (the closing quote/paren)."""
+    tail = match.string[match.end("path"):match.end()]
+    return re.sub(r'^\?v=[0-9a-f]+', '', tail)
+
+
+def _walk(directories):
+    for directory in directories:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                # Skip temp files and pre-compressed siblings (they aren't referenced)
+                if not name.endswith(".tmp") and precompress.strip_sibling(name) == name:
+                    yield os.path.join(root, name).replace(os.sep, "/")
+
+
+def minified_path(path):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.min{ext}"
+
+
+def source_path(path):
+    """For a generated .min file, the source it was made from (otherwise path itself)."""
+    stem, ext = os.path.splitext(path)
+    if stem.endswith(".min") and os.path.exists(stem[:-len(".min")] + ext):
+        return stem[:-len(".min")] + ext
+    return path
+
+
+def served_path(path):
+    """The file pages should reference for path: its minified output when there is one."""
+    source = source_path(path)
+    if source.endswith(MINIFY_EXTENSIONS) and os.path.exists(minified_path(source)):
+        return minified_path(source)
+    return source
+
+
+def minify_assets(files, enabled=True):
+    """
+    Writes <name>.min.css/.min.js for every stylesheet and script that isn't
+    minified already. With enabled=False the generated files are removed
+    instead, so pages fall back to the sources.
+    """
+    for path in files:
+        if not path.endswith(MINIFY_EXTENSIONS) or source_path(path) != path or ".min." in os.path.basename(path):
+            continue
+        target = minified_path(path)
+        if not enabled:
+            if os.path.exists(target):
+                os.remove(target)
+            continue
+        text = _read(path)
+        result = minify.cached(path.rsplit(".", 1)[1], text)
+        if output.write(target, result):
+            minify.report(target, text, result)
+
+
+def fingerprint_assets(minify_outputs=True):
+    """
+    Minifies stylesheets and scripts, rewrites asset references to their
+    fingerprinted URLs and regenerates the asset manifest and service worker.
+    Returns the {path: hash} manifest.
+    """
+    files = list(_walk(FINGERPRINT_DIRS))
+    hashes = {}
+    state, new_state = _load_state(), {}
+    hash_file = partial(_cached_hash, state=state, new_state=new_state)
+    rewritten = 0
+
+    # Files that reference other assets are rewritten first, then hashed as rewritten
+    for path in files:
+        if path.endswith(".css") and source_path(path) == path:
+            pattern = CSS_URL_PATTERN
+        elif path.endswith(".json") and path.startswith("assets/live2d/"):
+            pattern = JSON_STRING_PATTERN
+        else:
+            continue
+        text = _read(path)
+        if output.write(path, _rewrite(text, pattern, os.path.dirname(path), hashes, hash_file)):
+            rewritten += 1
+
+    # Minified outputs are made from the rewritten sources
+    minify_assets(files, minify_outputs)
+    files = list(_walk(FINGERPRINT_DIRS))
+
+    for path in files:
+        # Re-hashed, not taken from the memo: rewriting may have changed the file
+        hashes[path] = hash_file(path)
+
+    for page, base_dir in PAGES.items():
+        if os.path.exists(page):
+            if output.write(page, _rewrite(_read(page), PAGE_ASSET_PATTERN, base_dir, hashes, hash_file, served_path)):
+                rewritten += 1
+
+    manifest = {path: hashes[path] for path in sorted(hashes)}
+    precache = precache_list(manifest)
+
+    output.write(ASSET_MANIFEST_PATH, json.dumps({
+        "version": 1,
+        "assets": {path: {"hash": digest, "size": os.path.getsize(path)} for path, digest in manifest.items()},
+        "precache": precache,
+    }, indent=2) + "\n")
+    output.write(SERVICE_WORKER_PATH, SERVICE_WORKER_TEMPLATE
+                 .replace("__ASSETS__", json.dumps(manifest, indent=2))
+                 .replace("__PRECACHE__", json.dumps(precache, indent=2)))
+
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    output.write(STATE_PATH, json.dumps(new_state, separators=(",", ":"), sort_keys=True))
+
+    print(f"[+] Fingerprinted {len(manifest)} asset(s), rewrote {rewritten} file(s).")
+    return manifest
+
+
+def precache_list(manifest):
+    """
+    Files every page load needs: stylesheets and what they reference, scripts,
+    and for each Live2D model its json files, .moc and default texture.
+    """
+    precache = set()
+    for path in manifest:
+        if served_path(path) != path:
+            continue  # A source pages don't load (its .min output is used)
+        if path.startswith(("assets/css/", "assets/js/")) or path.endswith(".json"):
+            precache.add(path)
+        if not path.startswith(FINGERPRINT_DIRS):
+            precache.add(path)  # Referenced from a stylesheet
+
+        if os.path.basename(path) == "model.json":
+            model_dir = os.path.dirname(path)
+            with open(path, "r", encoding="utf-8") as f:
+                model = json.load(f)
+            for ref in [model.get("model")] + list(model.get("textures", [])[:1]):
+                if isinstance(ref, str):
+                    ref_path = _repo_path(model_dir, ref.split("?v=")[0])
+                    if ref_path in manifest:
+                        precache.add(ref_path)
+    return sorted(precache)
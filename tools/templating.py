@@ -0,0 +1,145 @@
+"""
+Compiled page templates.
+
+A template is compiled once into a flat list of literal segments and named
+slots, and rendered with a single join. Injected values are never scanned
+again, so a post body containing "[AUTHOR]" or "{{ CONTENT }}" is emitted
+verbatim.
+
+Slot syntax:
+  {{ name }}      a named slot (names are case-insensitive)
+  {{> name }}     the partial PARTIALS_DIR/name.html, inlined at compile time
+  the legacy writeup-template.html placeholders listed in LEGACY_SLOTS
+"""
+import os
+import re
+
+PARTIALS_DIR = os.path.join("templates", "partials")
+
+LEGACY_SLOTS = {
+    "[PAGE_TITLE]": "page_title",
+    "[TITLE]": "title",
+    "[WRITEUP TITLE HERE]": "title",
+    "[YYYY-MM-DD]": "date",
+    "[WEB/NETWORK/CTF]": "category",
+    "[AUTHOR]": "author",
+    "<!-- SEO_TAGS_PLACEHOLDER -->": "seo_tags",
+    "<!-- DISCLAIMER_PLACEHOLDER -->": "disclaimer",
+}
+
+SLOT_PATTERN = re.compile(
+    r'\{\{\s*(?P<partial>>)?\s*(?P<name>[A-Za-z_][A-Za-z0-9_-]*)\s*\}\}'
+    r'|(?P<legacy>' + "|".join(re.escape(p) for p in sorted(LEGACY_SLOTS, key=len, reverse=True)) + ')'
+)
+
+_cache = {}
+
+
+class Template:
+    def __init__(self, segments, dependencies):
+        # Literal strings alternate with slot names, stored as 1-tuples
+        self.segments = segments
+        self.dependencies = dependencies
+        self.slots = {seg[0] for seg in segments if isinstance(seg, tuple)}
+
+    def render(self, values):
+        """Fills every slot from values (missing slots render empty)."""
+        return "".join(
+            values.get(seg[0], "") if isinstance(seg, tuple) else seg
+            for seg in self.segments
+        )
+
+
+def read_partial(path):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    # Partial files end with a newline that isn't part of the markup
+    return text[:-1] if text.endswith("\n") else text
+
+
+def compile_template(text, partials_dir=PARTIALS_DIR, dependencies=None, _stack=()):
+    """Compiles template text into a Template, inlining partials."""
+    if dependencies is None:
+        dependencies = {}
+    segments = []
+    pos = 0
+
+    for match in SLOT_PATTERN.finditer(text):
+        if match.start() > pos:
+            segments.append(text[pos:match.start()])
+        pos = match.end()
+
+        if match.group("legacy"):
+            segments.append((LEGACY_SLOTS[match.group("legacy")],))
+            continue
+
+        name = match.group("name").lower()
+        if not match.group("partial"):
+            segments.append((name,))
+            continue
+
+        if name in _stack:
+            raise ValueError(f"Partial '{name}' includes itself")
+        path = os.path.join(partials_dir, f"{name}.html")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Partial '{name}' not found at {path}")
+        dependencies[path] = os.stat(path).st_mtime_ns
+        partial = compile_template(read_partial(path), partials_dir, dependencies, _stack + (name,))
+        segments.extend(partial.segments)
+
+    if pos < len(text):
+        segments.append(text[pos:])
+
+    # Merge adjacent literals left behind by inlined partials
+    merged = []
+    for seg in segments:
+        if merged and isinstance(seg, str) and isinstance(merged[-1], str):
+            merged[-1] += seg
+        else:
+            merged.append(seg)
+    return Template(merged, dependencies)
+
+
+def _is_fresh(template):
+    for path, mtime in template.dependencies.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def load(path, partials_dir=PARTIALS_DIR):
+    """
+    Returns the compiled template for path, recompiling only when the file or
+    one of its partials changed on disk.
+    """
+    cached = _cache.get(path)
+    if cached and _is_fresh(cached):
+        return cached
+
+    dependencies = {path: os.stat(path).st_mtime_ns}
+    if path.startswith(partials_dir + os.sep):
+        text = read_partial(path)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    template = compile_template(text, partials_dir, dependencies)
+    _cache[path] = template
+    return template
+
+
+def render_partial(name, values, partials_dir=PARTIALS_DIR):
+    """Renders a single partial on its own."""
+    return load(os.path.join(partials_dir, f"{name}.html"), partials_dir).render(values)
+
+
+def source_files(path, partials_dir=PARTIALS_DIR):
+    """Returns the template and every partial file, for fingerprinting."""
+    files = [path]
+    if os.path.isdir(partials_dir):
+        files += sorted(
+            os.path.join(partials_dir, f) for f in os.listdir(partials_dir) if f.endswith(".html")
+        )
+    return files
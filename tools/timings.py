@@ -0,0 +1,211 @@
+"""
+Build timings and profiling (--timings / --profile).
+
+A Clock splits the time since it was created into named stages: lap(stage)
+charges the wall and CPU time since the previous lap to that stage.
+process_file() keeps one Clock per post and hands clock.record() back with
+the post's metadata, so per-file timings come back from pool workers the
+same way the metadata does. build() laps a Report's clock between its global
+stages; the Report then prints the slowest stages and files and writes the
+whole thing as JSON.
+
+profiling(path) runs cProfile over a block. Pool workers can't share the
+parent's profiler, so process_files() wraps each task in run_profiled(),
+which dumps the task's profile into a directory next to path; the dumps are
+merged into path (pstats format, for `python -m pstats` or snakeviz) and
+path + ".folded" (folded stacks for flamegraph.pl / speedscope). cProfile
+only records caller/callee pairs, so the stacks are rebuilt from the call
+graph with each function's time split over its callers in proportion.
+"""
+import os
+import json
+import time
+import shutil
+import pstats
+import cProfile
+import itertools
+from contextlib import contextmanager
+
+DEFAULT_REPORT_PATH = os.path.join(".build", "timings.json")
+TOP = 10
+# Call paths carrying less time than this are left out of the folded stacks
+MIN_FOLDED_SECONDS = 1e-4
+
+
+class Clock:
+    """Charges elapsed wall/CPU time to named stages, and counts bytes read and written."""
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def lap(self, stage):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        entry = self.stages.setdefault(stage, {"wall": 0.0, "cpu": 0.0})
+        entry["wall"] += wall - self._wall
+        entry["cpu"] += cpu - self._cpu
+        self._wall = wall
+        self._cpu = cpu
+
+    def record(self):
+        return {
+            "file": self.name,
+            "wall": sum(s["wall"] for s in self.stages.values()),
+            "cpu": sum(s["cpu"] for s in self.stages.values()),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "stages": self.stages,
+        }
+
+
+class Report:
+    """Timings of one build: the build's own stages plus one record per converted file."""
+
+    def __init__(self, profile_dir=None):
+        self.clock = Clock("build")
+        self.files = []
+        # Where pool workers dump their profiles (see run_profiled)
+        self.profile_dir = profile_dir
+
+    def add_file(self, record):
+        if record:
+            self.files.append(record)
+
+    def file_stages(self):
+        """Per-file stages summed over every file."""
+        totals = {}
+        for record in self.files:
+            for stage, timing in record["stages"].items():
+                total = totals.setdefault(stage, {"wall": 0.0, "cpu": 0.0})
+                total["wall"] += timing["wall"]
+                total["cpu"] += timing["cpu"]
+        return totals
+
+    def to_json(self):
+        return {
+            "version": 1,
+            "build": self.clock.record(),
+            "file_stages": self.file_stages(),
+            "files": sorted(self.files, key=lambda r: r["wall"], reverse=True),
+        }
+
+    def summary(self, top=TOP):
+        build = self.clock.record()
+        print(f"[*] Build took {build['wall']:.3f}s wall, {build['cpu']:.3f}s CPU (this process).")
+        print("[*] Build stages:")
+        for stage, timing in sorted(build["stages"].items(), key=lambda item: item[1]["wall"], reverse=True):
+            print(f"    {stage:<22} {timing['wall']:>9.3f}s wall {timing['cpu']:>9.3f}s cpu")
+        if not self.files:
+            return
+        print(f"[*] Per-file stages (summed over {len(self.files)} file(s)):")
+        for stage, timing in sorted(self.file_stages().items(), key=lambda item: item[1]["wall"], reverse=True):
+            print(f"    {stage:<22} {timing['wall']:>9.3f}s wall {timing['cpu']:>9.3f}s cpu")
+        print("[*] Slowest files:")
+        for record in sorted(self.files, key=lambda r: r["wall"], reverse=True)[:top]:
+            slowest = max(record["stages"].items(), key=lambda item: item[1]["wall"])[0] if record["stages"] else "-"
+            print(f"    {record['wall']:>8.3f}s  {record['file']}  (mostly {slowest}; "
+                  f"{record['bytes_read']} bytes in, {record['bytes_written']} out)")
+
+    def write(self, path=DEFAULT_REPORT_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, path)
+        print(f"[+] Timings written to {path}")
+
+
+_task_ids = itertools.count()
+
+
+def run_profiled(func, profile_dir, *args, **kwargs):
+    """Worker side: runs func under cProfile and dumps the profile into profile_dir."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(os.path.join(profile_dir, f"{os.getpid()}-{next(_task_ids)}.prof"))
+
+
+def _label(func):
+    filename, line, name = func
+    label = f"{name} ({os.path.basename(filename)}:{line})" if line else name
+    return label.replace(";", ",").replace(" ", "_")
+
+
+def folded_stacks(stats):
+    """
+    Rebuilds {"root;caller;callee": seconds} from pstats data. A function's
+    time on a path is its total time scaled by the share of calls coming in
+    along that path.
+    """
+    children = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+
+    stacks = {}
+
+    def walk(func, path, seen, seconds):
+        _, _, own, cumulative, _ = stats[func]
+        if seconds < MIN_FOLDED_SECONDS or cumulative <= 0:
+            return
+        path = path + (_label(func),)
+        scale = seconds / cumulative
+        key = ";".join(path)
+        stacks[key] = stacks.get(key, 0.0) + own * scale
+        for child, edge_cumulative in children.get(func, ()):
+            if child not in seen:
+                walk(child, path, seen | {child}, edge_cumulative * scale)
+
+    for func, (_, _, _, cumulative, callers) in stats.items():
+        if not callers:
+            walk(func, (), {func}, cumulative)
+    return stacks
+
+
+def write_folded(stats, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, seconds in sorted(folded_stacks(stats).items()):
+            microseconds = int(seconds * 1e6)
+            if microseconds:
+                f.write(f"{stack} {microseconds}\n")
+
+
+@contextmanager
+def profiling(path, report=None):
+    """
+    Profiles the block (and, through report.profile_dir, the pool workers)
+    into path and path + ".folded". A no-op when path is None.
+    """
+    if not path:
+        yield
+        return
+    worker_dir = f"{path}.workers"
+    shutil.rmtree(worker_dir, ignore_errors=True)
+    os.makedirs(worker_dir)
+    if report is not None:
+        report.profile_dir = worker_dir
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+        worker_files = sorted(os.listdir(worker_dir))
+        for name in worker_files:
+            stats.add(os.path.join(worker_dir, name))
+        shutil.rmtree(worker_dir, ignore_errors=True)
+        stats.dump_stats(path)
+        write_folded(stats.stats, path + ".folded")
+        workers = f" (plus {len(worker_files)} worker task(s))" if worker_files else ""
+        print(f"[+] Profile written to {path} and {path}.folded{workers}")